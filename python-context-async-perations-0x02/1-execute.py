@@ -8,15 +8,29 @@ to handle database connections and query execution.
 Usage:
     with ExecuteQuery("users.db", "SELECT * FROM users WHERE age > ?", (25,)) as results:
         print("Users older than 25:", results)
+
+Pass an open connection as `conn` to run on a persistent (e.g. pooled)
+connection instead; it is left open, so SQLite's prepared-statement cache
+stays warm across queries.
+
+With stream=True the rows are not fetched up front: the context yields a
+lazy iterator (or fetchmany batches with batch_size) bound to the open
+connection, so it must be consumed inside the with block:
+    with ExecuteQuery("users.db", "SELECT * FROM users", stream=True,
+                      row_type="named") as rows:
+        for row in rows:
+            print(row.name, row.age)
 """
 
 import sqlite3
+from collections import namedtuple
 
 
 class ExecuteQuery:
     """Context manager for executing queries with automatic connection handling."""
 
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, conn=None, stream=False,
+                 batch_size=None, row_type=None):
         """
         Initialize with database name, query, and optional parameters.
         
@@ -24,25 +38,71 @@ class ExecuteQuery:
             db_name (str): The SQLite database file.
             query (str): The SQL query to execute.
             params (tuple): Parameters for the SQL query (default: None).
+            conn (sqlite3.Connection): Existing connection to use; it is
+                not closed on exit (default: open one for db_name).
+            stream (bool): Yield rows lazily instead of a fetched list.
+            batch_size (int): With stream, yield lists of up to this many
+                rows (fetchmany) instead of single rows.
+            row_type: None for plain tuples, "named" for namedtuple rows
+                (fields from the result columns), or a callable taking the
+                column values positionally, e.g. a class with __slots__.
         """
         self.db_name = db_name
         self.query = query
         self.params = params or ()
-        self.conn = None
+        self.conn = conn
+        self.owns_conn = conn is None
+        self.stream = stream
+        self.batch_size = batch_size
+        self.row_type = row_type
         self.results = None
 
+    def _row_maker(self, cursor):
+        """
+        Returns a function converting one fetched row into row_type, or
+        None to keep rows as the connection returns them. Applied here
+        rather than through cursor.row_factory, so the row_factory of a
+        passed-in connection is left alone.
+        """
+        if self.row_type is None or cursor.description is None:
+            return None
+        if self.row_type == "named":
+            columns = [d[0] for d in cursor.description]
+            return namedtuple("Row", columns, rename=True)._make
+        row_type = self.row_type
+        return lambda row: row_type(*row)
+
+    def _batches(self, cursor, make):
+        """Generator of fetchmany batches."""
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            yield [make(row) for row in rows] if make else rows
+
     def __enter__(self):
-        """Open the connection, execute the query, and return results."""
-        self.conn = sqlite3.connect(self.db_name)
+        """
+        Open the connection, execute the query, and return results (a list,
+        or a lazy iterator in stream mode).
+        """
+        if self.owns_conn:
+            self.conn = sqlite3.connect(self.db_name)
         cursor = self.conn.cursor()
         cursor.execute(self.query, self.params)
-        self.results = cursor.fetchall()
-        return self.results
+        make = self._row_maker(cursor)
+        if not self.stream:
+            rows = cursor.fetchall()
+            self.results = [make(row) for row in rows] if make else rows
+            return self.results
+        if self.batch_size:
+            return self._batches(cursor, make)
+        return map(make, cursor) if make else iter(cursor)
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """Close the database connection after use."""
-        if self.conn:
+        """Close the database connection after use (unless it was passed in)."""
+        if self.conn and self.owns_conn:
             self.conn.close()
+            self.conn = None
 
 
 # Example usage
@@ -4,42 +4,157 @@ Task 2: Concurrent Asynchronous Database Queries
 
 This script uses aiosqlite and asyncio.gather() to fetch data from a users.db
 SQLite database concurrently.
+
+fetch_concurrently() runs both queries on one AsyncSQLitePool
+(async_db_pool.py) instead of opening (and starting a thread for) a new
+aiosqlite connection per call, and closes the pool when it is done. The
+fetch functions take that pool as an argument; called on their own they
+open a dedicated connection as before.
+
+fan_out() generalizes fetch_concurrently to any list of (query, params)
+pairs: bounded concurrency, per-query timeouts, results streamed back as
+they complete, and failures reported per query instead of cancelling the
+rest.
 """
 
 import asyncio
+from collections import namedtuple
+from contextlib import asynccontextmanager
+
 import aiosqlite
+from async_db_pool import AsyncSQLitePool
+
+QueryResult = namedtuple("QueryResult", "index query params rows error")
+
 
+@asynccontextmanager
+async def _connection(pool=None):
+    """Borrows a connection from `pool`, or opens one to users.db."""
+    if pool is None:
+        async with aiosqlite.connect("users.db") as db:
+            yield db
+    else:
+        async with pool.connection() as db:
+            yield db
 
-async def async_fetch_users():
+
+async def async_fetch_users(pool=None):
     """
     Fetch all users asynchronously from the users table.
     """
-    async with aiosqlite.connect("users.db") as db:
+    async with _connection(pool) as db:
         cursor = await db.execute("SELECT * FROM users")
         results = await cursor.fetchall()
         await cursor.close()
         return results
 
 
-async def async_fetch_older_users():
+async def async_fetch_older_users(pool=None):
     """
     Fetch all users older than 40 asynchronously from the users table.
     """
-    async with aiosqlite.connect("users.db") as db:
+    async with _connection(pool) as db:
         cursor = await db.execute("SELECT * FROM users WHERE age > 40")
         results = await cursor.fetchall()
         await cursor.close()
         return results
 
 
+async def _run_query(db, query, params):
+    """Runs one query on `db` and returns all rows."""
+    cursor = await db.execute(query, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return rows
+
+
+async def fan_out(queries, concurrency=10, timeout=None, fail_fast=False,
+                  pool=None):
+    """
+    Async generator that runs many queries concurrently and yields a
+    QueryResult(index, query, params, rows, error) for each as it completes.
+
+    Args:
+        queries (iterable): (query, params) pairs; index is the position.
+        concurrency (int): Maximum number of queries running at once.
+        timeout (float): Per-query time limit in seconds, counted once the
+            query has a connection (None = no limit). A query that runs
+            over yields error=TimeoutError. Waiting for a connection is
+            not counted; it is bounded by the pool's own timeout.
+        fail_fast (bool): Raise the first error and cancel the queries
+            still pending, instead of yielding it and carrying on.
+        pool (AsyncSQLitePool): Pool to use (default: a pool of
+            `concurrency` connections to users.db, closed when the
+            generator finishes).
+
+    Usage:
+        async for result in fan_out([(sql, (25,)), (sql, (40,))], concurrency=4):
+            print(result.index, result.error or len(result.rows))
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = AsyncSQLitePool("users.db", max_size=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index, query, params):
+        async with semaphore:
+            try:
+                db = await pool.acquire()
+            except Exception as e:
+                return QueryResult(index, query, params, None, e)
+            # a query that timed out (or was cancelled) is still running on
+            # the connection's thread: interrupt it and close the connection
+            discard = True
+            try:
+                rows = await asyncio.wait_for(
+                    _run_query(db, query, params), timeout)
+                discard = False
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"Query {index} exceeded {timeout}s")
+                return QueryResult(index, query, params, None, error)
+            except Exception as e:
+                discard = False
+                return QueryResult(index, query, params, None, e)
+            finally:
+                if discard:
+                    await db.interrupt()
+                await pool.release(db, discard=discard)
+            return QueryResult(index, query, params, rows, None)
+
+    tasks = [asyncio.ensure_future(run(i, query, params))
+             for i, (query, params) in enumerate(queries)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if fail_fast and result.error is not None:
+                raise result.error
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if own_pool:
+            await pool.close()
+
+
+async def fetch_many(queries, **options):
+    """
+    Runs fan_out() to completion and returns its QueryResults in input
+    order.
+    """
+    results = [result async for result in fan_out(queries, **options)]
+    return sorted(results, key=lambda r: r.index)
+
+
 async def fetch_concurrently():
     """
     Run both queries concurrently using asyncio.gather.
     """
-    users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+    async with AsyncSQLitePool("users.db") as pool:
+        users, older_users = await asyncio.gather(
+            async_fetch_users(pool),
+            async_fetch_older_users(pool)
+        )
     print("All Users:", users)
     print("Users older than 40:", older_users)
 
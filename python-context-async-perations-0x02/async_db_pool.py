@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Async connection pool for aiosqlite.
+
+Every aiosqlite connection runs on its own worker thread, so opening one
+per query (as `async with aiosqlite.connect(...)` does) pays for a thread
+start, a file open and a cold statement cache each time. AsyncSQLitePool
+keeps a bounded set of open connections and lends them to coroutines.
+
+The pool belongs to whoever creates it and must be closed by them (the
+connection threads keep the process alive otherwise):
+
+    async with AsyncSQLitePool("users.db", max_size=10) as pool:
+        async with pool.connection() as db:
+            cursor = await db.execute("SELECT * FROM users")
+            rows = await cursor.fetchall()
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+
+class AsyncSQLitePool:
+    """
+    Bounded pool of aiosqlite connections to one database.
+
+    - At most `max_size` connections are open; acquire() waits up to
+      `timeout` seconds for one to be returned (TimeoutError after that).
+    - Health checks: a connection idle for more than `ping_after` seconds
+      runs `SELECT 1` before it is handed out and is replaced if that fails.
+    - Connections idle for more than `idle_timeout` seconds are closed.
+    - Uncommitted work is rolled back when a connection is returned.
+    - A connection whose checkout or return is cancelled midway is closed
+      and its slot freed, so cancellations never shrink the pool.
+    """
+
+    def __init__(self, database, max_size=10, timeout=10.0, ping_after=30.0,
+                 idle_timeout=300.0, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.idle_timeout = idle_timeout
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # (conn, last used)
+        self._open = 0
+        self._closed = False
+        self._in_use = set()
+        self._stopping = set()  # stop() futures of discarded connections
+        self._cond = asyncio.Condition()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "timeouts": 0,
+                       "pings": 0, "broken": 0, "expired": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _healthy(self, conn, idle_for):
+        """Pings a connection that has been idle longer than ping_after."""
+        if idle_for <= self.ping_after:
+            return True
+        self._stats["pings"] += 1
+        try:
+            await conn.execute("SELECT 1")
+            return True
+        except Exception:
+            self._stats["broken"] += 1
+            return False
+
+    def _forget(self, conn):
+        """
+        Closes `conn` and frees its slot without awaiting, so it also works
+        while a cancellation is propagating: Connection.stop() queues the
+        close and ends the worker thread (close() waits for that), and a
+        waiter is woken in a background task. Pass None for a connection
+        that never finished connecting: aiosqlite has already stopped it,
+        and a second stop() would queue behind its stop and never resolve.
+        """
+        self._open -= 1
+        if conn is not None:
+            stopped = conn.stop()
+            if stopped is not None:
+                self._stopping.add(stopped)
+                stopped.add_done_callback(self._stopping.discard)
+        asyncio.get_running_loop().create_task(self._wake())
+
+    async def _wake(self):
+        async with self._cond:
+            self._cond.notify()
+
+    async def acquire(self):
+        """Checks out a connection (reusing an idle one when possible)."""
+        if self._closed:
+            raise RuntimeError("Pool is closed")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            async with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise TimeoutError(
+                            f"No pooled connection to {self.database} "
+                            f"within {self.timeout}s")
+                    self._stats["waits"] += 1
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                if self._idle:
+                    # most recently used first: its caches are warmest
+                    conn, last_used = self._idle.pop()
+                else:
+                    conn = None
+                    self._open += 1
+            # From here on this coroutine owns a slot; give it back if it
+            # fails or is cancelled before the connection is handed out.
+            if conn is None:
+                self._stats["misses"] += 1
+                try:
+                    conn = await aiosqlite.connect(self.database,
+                                                   **self.connect_kwargs)
+                except BaseException:
+                    self._forget(None)
+                    raise
+                self._in_use.add(conn)
+                return conn
+            try:
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.idle_timeout:
+                    self._stats["expired"] += 1
+                    healthy = False
+                else:
+                    healthy = await self._healthy(conn, idle_for)
+            except BaseException:
+                self._forget(conn)
+                raise
+            if healthy:
+                self._stats["hits"] += 1
+                self._in_use.add(conn)
+                return conn
+            self._forget(conn)
+
+    async def release(self, conn, discard=False):
+        """
+        Returns a connection, rolling back any open transaction. Broken or
+        closed connections, and any returned after close(), are discarded.
+        Each checkout is returned once (ValueError otherwise).
+        """
+        if conn not in self._in_use:
+            raise ValueError("Connection is not checked out from this pool")
+        self._in_use.discard(conn)
+        try:
+            if not discard and not self._closed:
+                try:
+                    if conn.in_transaction:
+                        await conn.rollback()
+                except Exception:
+                    discard = True
+        except BaseException:
+            self._forget(conn)
+            raise
+        if discard or self._closed:
+            self._forget(conn)
+            return
+        async with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Async context manager that borrows a connection for the block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        """
+        Closes all idle connections and waits (up to `timeout` seconds) for
+        discarded ones to finish closing; connections still checked out are
+        closed when they are returned.
+        """
+        self._closed = True
+        idle, self._idle = self._idle, []
+        self._open -= len(idle)
+        for conn, _ in idle:
+            await conn.close()
+        if self._stopping:
+            await asyncio.wait(list(self._stopping), timeout=self.timeout)
+
+    def stats(self):
+        """Returns hit/miss/wait/timeout/health counters and occupancy."""
+        return dict(self._stats, open=self._open, idle=len(self._idle),
+                    max_size=self.max_size)
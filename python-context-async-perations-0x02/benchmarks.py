@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Ad-hoc benchmarks for the async queries in this directory.
+
+Run next to a populated users.db:
+    python3 benchmarks.py pool 10
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import aiosqlite
+from async_db_pool import AsyncSQLitePool
+
+QUERY = "SELECT * FROM users WHERE age > ?"
+
+
+def _report(label, latencies, elapsed):
+    """Prints p50/p95/max latency (ms) and the wall time of one round."""
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<24} {len(latencies):>5} queries  "
+          f"p50 {statistics.median(latencies) * 1000:8.2f} ms  "
+          f"p95 {p95 * 1000:8.2f} ms  max {latencies[-1] * 1000:8.2f} ms  "
+          f"wall {elapsed * 1000:8.2f} ms")
+
+
+async def _round(label, query_once, concurrency, rounds):
+    """Runs `concurrency` queries at once, `rounds` times, and reports."""
+    latencies = []
+
+    async def timed():
+        start = time.perf_counter()
+        await query_once()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(timed() for _ in range(concurrency)))
+    _report(label, latencies, time.perf_counter() - start)
+
+
+async def _bench_pool(max_size, rounds):
+    async def per_call():
+        async with aiosqlite.connect("users.db") as db:
+            cursor = await db.execute(QUERY, (40,))
+            await cursor.fetchall()
+
+    pool = AsyncSQLitePool("users.db", max_size=max_size)
+
+    async def pooled():
+        async with pool.connection() as db:
+            cursor = await db.execute(QUERY, (40,))
+            await cursor.fetchall()
+
+    for concurrency in (1, 10, 100):
+        await _round(f"connect x{concurrency}", per_call, concurrency, rounds)
+        await _round(f"pool({max_size}) x{concurrency}", pooled, concurrency,
+                     rounds)
+    print(pool.stats())
+    await pool.close()
+
+
+def bench_pool(max_size=10, rounds=20):
+    """Latency at 1/10/100 concurrent queries: per-call connect vs pool."""
+    asyncio.run(_bench_pool(max_size, rounds))
+
+
+BENCHMARKS = {
+    "pool": bench_pool,
+}
+
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "pool"
+    args = [int(a) for a in sys.argv[2:]]
+    BENCHMARKS[name](*args)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Unit tests for async_db_pool.py.
+
+Covers:
+- acquire timeout when the pool is exhausted
+- cancelling acquire while waiting, while connecting and while pinging
+- release/close bookkeeping (double release, returns after close)
+
+Runs offline against a temporary SQLite file.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from async_db_pool import AsyncSQLitePool
+
+
+class TestAsyncSQLitePool(unittest.IsolatedAsyncioTestCase):
+    """Tests for AsyncSQLitePool."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "users.db")
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INT)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def close(self, pool):
+        """close() must finish promptly; a hang fails the test."""
+        await asyncio.wait_for(pool.close(), 5)
+
+    async def test_acquire_times_out(self):
+        """acquire raises TimeoutError once the pool stays exhausted."""
+        pool = AsyncSQLitePool(self.database, max_size=1, timeout=0.05)
+        conn = await pool.acquire()
+        with self.assertRaises(TimeoutError):
+            await pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        await pool.release(conn)
+        await self.close(pool)
+
+    async def test_reuses_idle_connection(self):
+        """A returned connection is handed out again."""
+        pool = AsyncSQLitePool(self.database, max_size=2)
+        async with pool.connection() as first:
+            pass
+        async with pool.connection() as second:
+            self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 1))
+        await self.close(pool)
+
+    async def test_cancel_while_waiting(self):
+        """A cancelled waiter does not take the slot it was waiting for."""
+        pool = AsyncSQLitePool(self.database, max_size=1)
+        conn = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await pool.release(conn)
+        async with pool.connection() as again:
+            self.assertIs(again, conn)
+        self.assertEqual(pool.stats()["open"], 1)
+        await self.close(pool)
+
+    async def test_cancel_while_connecting(self):
+        """Cancelling during connect frees the slot and close() returns."""
+        pool = AsyncSQLitePool(self.database, max_size=1, timeout=1)
+        task = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)  # inside aiosqlite.connect
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(pool.stats()["open"], 0)
+        async with pool.connection() as conn:
+            cursor = await conn.execute("SELECT 1")
+            self.assertEqual(await cursor.fetchall(), [(1,)])
+        await self.close(pool)
+
+    async def test_cancel_while_pinging(self):
+        """Cancelling the health check closes that connection, frees it."""
+        pool = AsyncSQLitePool(self.database, max_size=1, ping_after=0)
+        async with pool.connection():
+            pass
+        await asyncio.sleep(0.01)
+        task = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)  # inside SELECT 1
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(pool.stats()["open"], 0)
+        async with pool.connection():
+            self.assertEqual(pool.stats()["open"], 1)
+        await self.close(pool)
+
+    async def test_rollback_on_release(self):
+        """Uncommitted work is rolled back when a connection is returned."""
+        pool = AsyncSQLitePool(self.database, max_size=1)
+        async with pool.connection() as conn:
+            await conn.execute("INSERT INTO users (age) VALUES (30)")
+        async with pool.connection() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM users")
+            self.assertEqual(await cursor.fetchall(), [(0,)])
+        await self.close(pool)
+
+    async def test_double_release(self):
+        """Returning the same checkout twice raises ValueError."""
+        pool = AsyncSQLitePool(self.database, max_size=1)
+        conn = await pool.acquire()
+        await pool.release(conn)
+        with self.assertRaises(ValueError):
+            await pool.release(conn)
+        self.assertEqual(pool.stats()["open"], 1)
+        await self.close(pool)
+
+    async def test_close(self):
+        """close() empties the pool; later returns are closed, not kept."""
+        pool = AsyncSQLitePool(self.database, max_size=2)
+        idle = await pool.acquire()
+        busy = await pool.acquire()
+        await pool.release(idle)
+        await self.close(pool)
+        self.assertEqual(pool.stats()["open"], 1)
+        await pool.release(busy)
+        await self.close(pool)
+        self.assertEqual(pool.stats()["open"], 0)
+        with self.assertRaises(RuntimeError):
+            await pool.acquire()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Unit tests for 3-concurrent.py.
+
+Covers:
+- fan_out / fetch_many results, ordering and partial failures
+- per-query timeouts (waiting for a pooled connection does not count)
+- fail_fast cancelling the queries still running
+
+Runs offline against a temporary SQLite file.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from async_db_pool import AsyncSQLitePool
+
+concurrent = __import__('3-concurrent')
+
+SLOW = ("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c "
+        "WHERE x < ?) SELECT COUNT(*) FROM c")
+OLDER = "SELECT name FROM users WHERE age > ? ORDER BY id"
+
+
+class TestFanOut(unittest.IsolatedAsyncioTestCase):
+    """Tests for fan_out and fetch_many."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        database = os.path.join(self.tmp.name, "users.db")
+        conn = sqlite3.connect(database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                     "name TEXT, age INT)")
+        conn.executemany("INSERT INTO users (name, age) VALUES (?, ?)",
+                         [("a", 20), ("b", 35), ("c", 50)])
+        conn.commit()
+        conn.close()
+        self.pool = AsyncSQLitePool(database, max_size=2)
+
+    async def asyncTearDown(self):
+        await asyncio.wait_for(self.pool.close(), 5)
+        self.tmp.cleanup()
+
+    async def test_fetch_many(self):
+        """Results come back in input order with their rows."""
+        results = await concurrent.fetch_many(
+            [(OLDER, (a,)) for a in (10, 30, 40, 60)], pool=self.pool)
+        self.assertEqual([r.index for r in results], [0, 1, 2, 3])
+        self.assertEqual([r.rows for r in results],
+                         [[("a",), ("b",), ("c",)], [("b",), ("c",)],
+                          [("c",)], []])
+        self.assertTrue(all(r.error is None for r in results))
+
+    async def test_streams_as_completed(self):
+        """A fast query is yielded before a slower one issued earlier."""
+        order = [r.index async for r in concurrent.fan_out(
+            [(SLOW, (2000000,)), (OLDER, (30,))], pool=self.pool)]
+        self.assertEqual(order, [1, 0])
+
+    async def test_partial_failure(self):
+        """A failing query is reported without affecting the others."""
+        results = await concurrent.fetch_many(
+            [(OLDER, (30,)), ("SELECT * FROM missing", ()), (OLDER, (40,))],
+            pool=self.pool)
+        self.assertIsInstance(results[1].error, sqlite3.OperationalError)
+        self.assertIsNone(results[1].rows)
+        self.assertEqual(results[0].rows, [("b",), ("c",)])
+        self.assertEqual(results[2].rows, [("c",)])
+
+    async def test_timeout(self):
+        """A query over the limit yields TimeoutError; its peers finish."""
+        results = await concurrent.fetch_many(
+            [(SLOW, (10 ** 9,)), (OLDER, (40,))], timeout=0.1,
+            pool=self.pool)
+        self.assertIsInstance(results[0].error, TimeoutError)
+        self.assertEqual(results[1].rows, [("c",)])
+        async with self.pool.connection() as db:
+            cursor = await db.execute("SELECT 1")
+            self.assertEqual(await cursor.fetchall(), [(1,)])
+
+    async def test_timeout_excludes_connection_wait(self):
+        """Queries queued behind a small pool are not timed out."""
+        results = await concurrent.fetch_many(
+            [(SLOW, (300000,))] * 16, concurrency=16, timeout=0.5,
+            pool=self.pool)
+        self.assertEqual([r.error for r in results], [None] * 16)
+        self.assertEqual(self.pool.stats()["timeouts"], 0)
+
+    async def test_fail_fast(self):
+        """fail_fast raises the first error and cancels the rest."""
+        queries = [(SLOW, (10 ** 9,)), ("SELECT * FROM missing", ())]
+        with self.assertRaises(sqlite3.OperationalError):
+            await asyncio.wait_for(concurrent.fetch_many(
+                queries, fail_fast=True, pool=self.pool), 5)
+        self.assertEqual(self.pool.stats()["open"],
+                         self.pool.stats()["idle"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,32 +3,239 @@
 Task 0: Logging Database Queries
 
 This script defines a decorator `log_queries` that logs SQL queries with timestamps
-before executing them. This improves observability during database operations.
+taken before executing them. This improves observability during database operations.
+
+On top of the log line, every call is timed with a monotonic clock and
+recorded per normalized query (count, errors, rows and a latency histogram
+for p50/p95/p99). Log lines go through a buffered sink drained by a
+background thread, so logging never blocks the query path; slow queries are
+always logged and the rest can be sampled.
 """
 
-import sqlite3
+import atexit
 import functools
+import math
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime  # Added for ALX requirement
 
 
-def log_queries(func):
+class BufferedLogSink:
+    """
+    Non-blocking log sink: emit() only enqueues the message and a daemon
+    thread (started on the first emit) writes it out. When the buffer is
+    full, messages are dropped (and counted) rather than stalling the
+    caller; messages whose write fails (e.g. a closed stdout pipe) are
+    counted as errors.
+    """
+
+    def __init__(self, write=print, maxsize=10000):
+        self.write = write
+        self.dropped = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _drain(self):
+        while True:
+            message = self._queue.get()
+            try:
+                self.write(message)
+            except Exception:
+                self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def emit(self, message):
+        """Queues a message for the background writer."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._drain,
+                                                    daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """
+        Waits until every queued message has been written, at most
+        `timeout` seconds. Returns True if the queue was drained.
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+
+class LatencyHistogram:
+    """
+    Log-scale latency histogram (4 buckets per doubling, from 1 microsecond)
+    giving percentile estimates within ~19% in constant memory.
+    """
+    BUCKETS_PER_DOUBLING = 4
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Adds one observation."""
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log2(micros) * self.BUCKETS_PER_DOUBLING)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile, in seconds."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                upper = 2 ** ((bucket + 1) / self.BUCKETS_PER_DOUBLING) / 1e6
+                return min(upper, self.max)
+        return self.max
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """
+    Collapses a SQL string to its shape so different literal values share
+    one set of metrics: literals become ?, IN lists become (?) and
+    whitespace is collapsed.
+    """
+    if query is None:
+        return None
+    shape = _LITERALS.sub("?", str(query))
+    shape = _IN_LISTS.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class QueryMetrics:
+    """Thread-safe per-normalized-query counters and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, query, seconds, rows=None, error=None):
+        """Records one execution of `query`."""
+        with self._lock:
+            entry = self._queries.get(query)
+            if entry is None:
+                entry = self._queries[query] = {
+                    "count": 0, "errors": 0, "rows": 0,
+                    "histogram": LatencyHistogram(),
+                }
+            entry["count"] += 1
+            entry["histogram"].record(seconds)
+            if error is not None:
+                entry["errors"] += 1
+            if rows is not None:
+                entry["rows"] += rows
+
+    def snapshot(self):
+        """Returns {query: {count, errors, rows, p50/p95/p99/max in ms}}."""
+        with self._lock:
+            return {
+                query: {
+                    "count": e["count"],
+                    "errors": e["errors"],
+                    "rows": e["rows"],
+                    "p50_ms": e["histogram"].percentile(50) * 1000,
+                    "p95_ms": e["histogram"].percentile(95) * 1000,
+                    "p99_ms": e["histogram"].percentile(99) * 1000,
+                    "max_ms": e["histogram"].max * 1000,
+                }
+                for query, e in self._queries.items()
+            }
+
+    def reset(self):
+        """Clears all recorded metrics."""
+        with self._lock:
+            self._queries.clear()
+
+
+metrics = QueryMetrics()
+log_sink = BufferedLogSink()
+atexit.register(log_sink.flush)
+
+
+def query_stats():
+    """Returns the metrics recorded by every @log_queries function."""
+    return metrics.snapshot()
+
+
+def log_queries(func=None, *, slow_ms=None, sample_rate=1.0, sink=None):
     """
     Decorator that logs the SQL query passed to the wrapped function,
     including a timestamp.
 
+    Can be used bare (@log_queries) or configured:
+    @log_queries(slow_ms=100, sample_rate=0.01) always logs queries slower
+    than 100 ms and 1% of the others. Every call is recorded in the module
+    `metrics` regardless of sampling.
+
     Args:
         func (function): The database function to wrap.
+        slow_ms (float): Slow-query threshold in milliseconds (None = off).
+        sample_rate (float): Fraction of non-slow queries to log.
+        sink (BufferedLogSink): Where log lines go (default: log_sink).
 
     Returns:
-        function: A wrapped function that logs the SQL query before execution.
+        function: A wrapped function that logs and measures the SQL query.
     """
+    if func is None:
+        return functools.partial(log_queries, slow_ms=slow_ms,
+                                 sample_rate=sample_rate, sink=sink)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Extract the query argument (assumes it's passed as 'query' or as first positional arg)
         query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Executing SQL Query: {query}")
-        return func(*args, **kwargs)
+        start = time.perf_counter()
+        error = None
+        rows = None
+        try:
+            result = func(*args, **kwargs)
+            if isinstance(result, (list, tuple)):
+                rows = len(result)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record(normalize_query(query), elapsed, rows, error)
+            slow = slow_ms is not None and elapsed * 1000 >= slow_ms
+            if slow or error is not None or random.random() < sample_rate:
+                status = f"failed: {error}" if error is not None else f"{rows} rows"
+                tag = "Slow SQL Query" if slow else "Executing SQL Query"
+                (sink or log_sink).emit(
+                    f"[{timestamp}] {tag}: {query} "
+                    f"({elapsed * 1000:.2f} ms, {status})"
+                )
     return wrapper
 
 
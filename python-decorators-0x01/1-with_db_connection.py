@@ -7,10 +7,15 @@ opens a SQLite database connection, passes it to the wrapped function,
 and ensures the connection is closed afterward.
 
 This approach avoids repetitive connection setup and cleanup in each function.
+
+For hot paths, `with_pooled_db_connection` (from db_pool.py) is a drop-in
+replacement that borrows connections from a per-database pool instead of
+opening and closing one per call.
 """
 
 import sqlite3
 import functools
+from db_pool import with_pooled_db_connection  # noqa: F401 (re-exported)
 
 
 def with_db_connection(func):
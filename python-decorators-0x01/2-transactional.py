@@ -6,10 +6,62 @@ This script implements two decorators:
 1. with_db_connection - automatically opens and closes a SQLite database connection.
 2. transactional - wraps database operations in a transaction, committing changes
    if successful or rolling them back if an error occurs.
+
+After a successful commit, cached query results (sql_cache.py) that read
+from any table the transaction wrote to are invalidated.
+
+Inside a `group_commit()` block, decorated calls share one connection and
+are committed together every `max_ops` calls or `max_ms` milliseconds
+(the age is checked as calls are made, see GroupCommit), so a loop of
+small writes pays for one commit per batch instead of one per call.
 """
 
 import sqlite3
 import functools
+import threading
+import time
+import sql_cache
+from contextlib import contextmanager
+from db_pool import tune_connection
+
+_local = threading.local()
+
+
+def active_group():
+    """Returns the GroupCommit open in this thread, or None."""
+    return getattr(_local, "group", None)
+
+
+@contextmanager
+def traced(conn):
+    """
+    Context manager that yields the list of statements run on `conn`
+    during the block.
+
+    A connection has a single trace callback, so only the outermost block
+    on a connection installs (and finally removes) it; nested blocks, such
+    as a transactional helper called from another one, add their own list
+    to it instead of replacing the outer block's trace.
+    """
+    traces = _local.__dict__.setdefault("traces", {})
+    sinks = traces.get(id(conn))
+    outermost = sinks is None
+    if outermost:
+        sinks = traces[id(conn)] = []
+
+        def trace(sql):
+            for sink in sinks:
+                sink.append(sql)
+        conn.set_trace_callback(trace)
+    statements = []
+    sinks.append(statements)
+    try:
+        yield statements
+    finally:
+        sinks.pop()
+        if outermost:
+            del traces[id(conn)]
+            conn.set_trace_callback(None)
 
 
 def with_db_connection(func):
@@ -21,6 +73,11 @@ def with_db_connection(func):
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        group = active_group()
+        if group is not None:
+            # share the connection of the open group commit
+            group.commit_if_due()
+            return func(group.conn, *args, **kwargs)
         conn = sqlite3.connect('users.db')
         try:
             return func(conn, *args, **kwargs)
@@ -29,12 +86,117 @@ def with_db_connection(func):
     return wrapper
 
 
+class GroupCommit:
+    """
+    Batches the transactional calls made on `conn` into shared commits.
+
+    A batch is committed once it holds `max_ops` calls or its first call
+    is `max_ms` milliseconds old. The age is checked whenever the group is
+    used (as calls start and complete) and by commit_if_due(); there is no
+    timer, because the connection belongs to the thread running the block.
+    A block that stops making calls for a while (and so keeps holding the
+    write lock) should call commit_if_due() or group.commit() itself.
+    If a call fails, the whole pending batch is rolled back, as a single
+    transaction would be; batches committed earlier are kept.
+    """
+
+    def __init__(self, conn, max_ops=100, max_ms=50.0):
+        self.conn = conn
+        self.max_ops = max_ops
+        self.max_ms = max_ms
+        self.pending = 0
+        self.started = None
+        self.statements = []
+        self.stats = {"ops": 0, "batches": 0, "rolled_back": 0}
+
+    def due(self):
+        """Tells whether the pending batch is full or older than max_ms."""
+        return self.pending > 0 and (
+            self.pending >= self.max_ops
+            or (time.monotonic() - self.started) * 1000 >= self.max_ms)
+
+    def commit_if_due(self):
+        """Commits the pending batch if it is due."""
+        if self.due():
+            self.commit()
+
+    def op_done(self):
+        """Counts a successful call and commits if the batch is due."""
+        if self.started is None:
+            self.started = time.monotonic()
+        self.pending += 1
+        self.stats["ops"] += 1
+        self.commit_if_due()
+
+    def commit(self):
+        """Commits the pending batch."""
+        if self.pending or self.conn.in_transaction:
+            self.conn.commit()
+            self.stats["batches"] += 1
+            sql_cache.default_cache.invalidate_statements(self.statements)
+        self._reset()
+
+    def rollback(self):
+        """Discards the pending batch."""
+        self.conn.rollback()
+        self.stats["rolled_back"] += self.pending
+        self._reset()
+
+    def _reset(self):
+        self.pending = 0
+        self.started = None
+        self.statements.clear()
+
+
+@contextmanager
+def group_commit(database="users.db", max_ops=100, max_ms=50.0, conn=None,
+                 tune=True):
+    """
+    Context manager that groups transactional calls into batched commits.
+
+    Opens one connection to `database` (or uses `conn`) for the block; with
+    `tune`, it is set up with WAL and synchronous=NORMAL (see
+    db_pool.tune_connection). The last batch is committed on exit, or
+    rolled back if the block raises. Between calls the batch stays open
+    (holding SQLite's write lock), so a block that also does slow work
+    without database calls should call group.commit_if_due() during it.
+
+    Usage:
+        with group_commit(max_ops=500) as group:
+            for user_id, email in changes:
+                update_user_email(user_id=user_id, new_email=email)
+                group.commit_if_due()  # before anything slow
+        print(group.stats)
+    """
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(database)
+    if tune:
+        tune_connection(conn)
+    group = GroupCommit(conn, max_ops, max_ms)
+    previous, _local.group = active_group(), group
+    try:
+        with traced(conn) as group.statements:
+            yield group
+            group.commit()
+    except BaseException:
+        group.rollback()
+        raise
+    finally:
+        _local.group = previous
+        if own:
+            conn.close()
+
+
 def transactional(func):
     """
     Decorator to manage database transactions.
 
     Begins a transaction, commits if the wrapped function executes successfully,
-    or rolls back if an exception occurs.
+    or rolls back if an exception occurs. Statements are traced while the
+    function runs so that a commit invalidates cached reads of the tables
+    it wrote to. Calls on the connection of an open group_commit() join
+    its current batch instead of committing on their own.
 
     Args:
         func (function): The database operation function.
@@ -44,14 +206,27 @@ def transactional(func):
     """
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
-        try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()
+        group = active_group()
+        if group is not None and group.conn is conn:
+            group.commit_if_due()
+            try:
+                result = func(conn, *args, **kwargs)
+            except Exception as e:
+                group.rollback()
+                print(f"Transaction failed: {e}")
+                raise
+            group.op_done()
             return result
-        except Exception as e:
-            conn.rollback()
-            print(f"Transaction failed: {e}")
-            raise
+        with traced(conn) as statements:
+            try:
+                result = func(conn, *args, **kwargs)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Transaction failed: {e}")
+                raise
+        sql_cache.default_cache.invalidate_statements(statements)
+        return result
     return wrapper
 
 
@@ -7,11 +7,20 @@ This script implements:
 2. retry_on_failure - Retries a database operation a set number of times if it fails.
 
 The retry decorator adds resilience to database operations that may fail due to transient issues.
+
+Retries back off exponentially with full jitter (so callers that failed
+together do not retry together), only transient errors are retried, and a
+process-wide RetryBudget caps how many extra attempts retries may add.
+Coroutine functions get an async wrapper that sleeps with asyncio.sleep.
 """
 
-import time
-import sqlite3
+import asyncio
 import functools
+import inspect
+import random
+import sqlite3
+import threading
+import time
 
 
 def with_db_connection(func):
@@ -31,30 +40,151 @@ def with_db_connection(func):
     return wrapper
 
 
-def retry_on_failure(retries=3, delay=2):
+# sqlite3.OperationalError messages that describe a transient condition;
+# everything else (syntax errors, missing tables, ...) fails immediately.
+TRANSIENT_SQLITE_ERRORS = (
+    "database is locked",
+    "database table is locked",
+    "database is busy",
+    "disk i/o error",
+    "unable to open database file",
+)
+
+
+def is_retryable(error):
+    """Returns True for errors worth retrying (lock contention, timeouts)."""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(m in message for m in TRANSIENT_SQLITE_ERRORS)
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class RetryBudget:
+    """
+    Token bucket shared by every retrying function in the process.
+
+    Each call deposits `ratio` tokens (up to `capacity`) and each retry
+    spends one, so over time retries add at most `ratio` extra attempts per
+    call; the initial `capacity` lets a quiet process absorb a short burst.
+    When the bucket is empty, failures are raised instead of retried.
+    """
+
+    def __init__(self, ratio=0.2, capacity=10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Credits one call."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Takes one token for a retry; False when the budget is spent."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+
+default_budget = RetryBudget()
+
+_counters = {"calls": 0, "attempts": 0, "retries": 0, "give_ups": 0,
+             "not_retryable": 0, "budget_exhausted": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(*names):
+    with _counters_lock:
+        for name in names:
+            _counters[name] += 1
+
+
+def retry_stats():
+    """Returns the call/attempt/retry/give-up counters of every wrapper."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def backoff_delay(attempt, delay, max_delay):
+    """Full jitter: uniform in [0, min(max_delay, delay * 2 ** (attempt - 1))]."""
+    return random.uniform(0, min(max_delay, delay * 2 ** (attempt - 1)))
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30.0, retry_if=is_retryable,
+                     budget=None):
     """
     Decorator to retry a function multiple times upon failure.
 
     Args:
-        retries (int): Number of times to retry before giving up.
-        delay (int): Delay in seconds between retries.
+        retries (int): Number of attempts before giving up.
+        delay (float): Base delay in seconds; attempt n waits a random time
+            of up to delay * 2 ** (n - 1), capped at max_delay.
+        max_delay (float): Upper bound for a single wait.
+        retry_if (callable): Predicate deciding whether an exception is
+            transient (default: is_retryable).
+        budget (RetryBudget): Retry budget to draw from (default:
+            the process-wide default_budget).
 
     Returns:
-        function: Wrapped function with retry mechanism.
+        function: Wrapped function with retry mechanism (a coroutine
+        function when the wrapped function is one).
     """
+    def next_delay(attempt, error):
+        """Seconds to wait before the next attempt, or None to give up."""
+        if not retry_if(error):
+            _count("not_retryable")
+            print(f"Attempt {attempt} failed: {error}. Not retryable.")
+            return None
+        if attempt >= retries:
+            _count("give_ups")
+            print(f"Attempt {attempt} failed: {error}. No more retries left.")
+            return None
+        if not (budget or default_budget).withdraw():
+            _count("give_ups", "budget_exhausted")
+            print(f"Attempt {attempt} failed: {error}. Retry budget exhausted.")
+            return None
+        _count("retries")
+        wait = backoff_delay(attempt, delay, max_delay)
+        print(f"Attempt {attempt} failed: {error}. Retrying in {wait:.2f}s...")
+        return wait
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                (budget or default_budget).deposit()
+                _count("calls")
+                for attempt in range(1, retries + 1):
+                    _count("attempts")
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        wait = next_delay(attempt, e)
+                        if wait is None:
+                            raise
+                    await asyncio.sleep(wait)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            (budget or default_budget).deposit()
+            _count("calls")
             for attempt in range(1, retries + 1):
+                _count("attempts")
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    if attempt < retries:
-                        print(f"Attempt {attempt} failed: {e}. Retrying in {delay}s...")
-                        time.sleep(delay)
-                    else:
-                        print(f"Attempt {attempt} failed: {e}. No more retries left.")
+                    wait = next_delay(attempt, e)
+                    if wait is None:
                         raise
+                time.sleep(wait)
         return wrapper
     return decorator
 
@@ -7,13 +7,16 @@ This script implements:
 2. cache_query - Caches query results to avoid redundant database calls.
 
 Caching improves performance when the same query is executed multiple times.
+The cache (sql_cache.py) is bounded, expires entries after a TTL and is
+invalidated per table by writes committed through `transactional`.
 """
 
 import sqlite3
 import functools
+import sql_cache
 
 # Global cache for storing query results
-query_cache = {}
+query_cache = sql_cache.default_cache
 
 
 def with_db_connection(func):
@@ -33,25 +36,66 @@ def with_db_connection(func):
     return wrapper
 
 
-def cache_query(func):
+def cache_query(func=None, *, ttl=None, stale_ttl=0.0, refresh_connect=None,
+                cache=None):
     """
-    Decorator to cache database query results based on the SQL query string.
+    Decorator to cache database query results based on the SQL query string
+    and its bound parameters.
 
-    If the query has been executed before, returns the cached result instead of
-    re-executing the database query.
+    If the query has been executed before (and the entry has neither
+    expired nor been invalidated by a write to one of its tables), returns
+    the cached result instead of re-executing the database query.
+    Concurrent misses for the same query run it only once and share the
+    result.
+
+    Can be used bare (@cache_query) or configured (@cache_query(ttl=30)).
+
+    Args:
+        ttl (float): Per-entry time to live in seconds (default: the cache's).
+        stale_ttl (float): Seconds an expired entry may still be served
+            while it is refreshed (stale-while-revalidate).
+        refresh_connect (callable): Opens a connection for refreshing stale
+            entries in the background; without it the first caller to see
+            a stale entry refreshes it inline.
+        cache (sql_cache.QueryCache): Cache to use (default: query_cache).
 
     Returns:
         function: Wrapped function with caching logic.
     """
+    if func is None:
+        return functools.partial(cache_query, ttl=ttl, stale_ttl=stale_ttl,
+                                 refresh_connect=refresh_connect, cache=cache)
+
     @functools.wraps(func)
     def wrapper(conn, query, *args, **kwargs):
-        if query in query_cache:
+        store = query_cache if cache is None else cache
+        try:
+            key = sql_cache.make_key(query, args, kwargs)
+            hash(key)
+        except TypeError:
+            # unhashable parameters: run uncached
+            return func(conn, query, *args, **kwargs)
+
+        def load():
+            print(f"Executing and caching result for query: {query}")
+            return func(conn, query, *args, **kwargs)
+
+        def refresh():
+            fresh_conn = refresh_connect()
+            try:
+                return func(fresh_conn, query, *args, **kwargs)
+            finally:
+                fresh_conn.close()
+
+        result, loaded = store.get_or_load(
+            key, load,
+            tables=sql_cache.tables_read(query),
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            refresher=refresh if refresh_connect else None,
+        )
+        if not loaded:
             print(f"Using cached result for query: {query}")
-            return query_cache[query]
-
-        print(f"Executing and caching result for query: {query}")
-        result = func(conn, query, *args, **kwargs)
-        query_cache[query] = result
         return result
     return wrapper
 
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Task 5: Circuit Breaker Decorator
+
+This script implements:
+1. CircuitBreaker - Tracks the failure rate of calls to a dependency.
+2. circuit_breaker - Fails fast while that dependency is down.
+
+When users.db stays locked or unavailable, retrying every call only piles
+up sleeping threads. The breaker watches the failure rate over a sliding
+time window; past a threshold it opens and rejects calls immediately with
+CircuitOpenError. After `reset_timeout` it lets a few probe calls through
+(half-open) and closes again once they succeed.
+
+It composes with the other decorators; put it outermost so an open
+circuit rejects before a connection is opened or a retry is scheduled:
+
+    @circuit_breaker(users_db_breaker)
+    @with_db_connection
+    @retry_on_failure(retries=3, delay=0.1)
+    def fetch_users(conn): ...
+
+CircuitOpenError is not retryable, so retries stop as soon as it opens.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+
+retry = __import__('3-retry_on_failure')
+with_db_connection = retry.with_db_connection
+retry_on_failure = retry.retry_on_failure
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the function while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker.
+
+    Args:
+        failure_rate (float): Fraction of failed calls in the window that
+            opens the circuit.
+        window (float): Length of the sliding window in seconds.
+        min_calls (int): Calls needed in the window before the rate counts.
+        reset_timeout (float): Seconds to stay open before probing.
+        half_open_calls (int): Successful probes needed to close again.
+        failure_if (callable): Decides whether an exception counts as a
+            failure of the dependency (default: the transient errors of
+            retry_on_failure; bugs such as SQL syntax errors do not count).
+    """
+
+    def __init__(self, failure_rate=0.5, window=30.0, min_calls=10,
+                 reset_timeout=30.0, half_open_calls=1,
+                 failure_if=retry.is_retryable):
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_if = failure_if
+        self.state = CLOSED
+        self._buckets = deque()  # [second, calls, failures]
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _window_counts(self, now):
+        """Drops buckets older than the window; returns (calls, failures)."""
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+        return (sum(b[1] for b in self._buckets),
+                sum(b[2] for b in self._buckets))
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._buckets.clear()
+        self._stats["opened"] += 1
+
+    def before_call(self):
+        """Admits a call or raises CircuitOpenError."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probes = self._probe_successes = 0
+            if self.state == HALF_OPEN:
+                if self._probes < self.half_open_calls:
+                    self._probes += 1
+                    return
+            elif self.state == CLOSED:
+                return
+            self._stats["rejected"] += 1
+            retry_in = max(0.0, self._opened_at + self.reset_timeout - now)
+            raise CircuitOpenError(
+                f"Circuit is {self.state}; retry in {retry_in:.1f}s")
+
+    def record(self, error=None):
+        """Records the outcome of an admitted call."""
+        failed = error is not None and self.failure_if(error)
+        with self._lock:
+            now = time.monotonic()
+            self._stats["calls"] += 1
+            if failed:
+                self._stats["failures"] += 1
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = CLOSED
+                return
+            if self.state == OPEN:
+                return
+            second = int(now)
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, 0])
+            self._buckets[-1][1] += 1
+            self._buckets[-1][2] += failed
+            calls, failures = self._window_counts(now)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._open(now)
+
+    def abandon(self):
+        """
+        Ends an admitted call that produced no outcome (cancelled or
+        interrupted): it counts neither way, but a half-open probe slot is
+        given back so the next caller can probe.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def reset(self):
+        """Forces the circuit closed and forgets the window."""
+        with self._lock:
+            self.state = CLOSED
+            self._buckets.clear()
+
+    def stats(self):
+        """Returns the state plus call/failure/rejection/open counters."""
+        with self._lock:
+            calls, failures = self._window_counts(time.monotonic())
+            return dict(self._stats, state=self.state,
+                        window_calls=calls, window_failures=failures)
+
+
+def circuit_breaker(breaker=None, **options):
+    """
+    Decorator that guards a function with a CircuitBreaker.
+
+    Args:
+        breaker (CircuitBreaker): Breaker to use; share one between all
+            functions that hit the same database. When omitted, a new
+            breaker is built from `options` (see CircuitBreaker).
+
+    Returns:
+        function: Wrapped function that raises CircuitOpenError while the
+        circuit is open (a coroutine function when the wrapped one is).
+    """
+    breaker = breaker or CircuitBreaker(**options)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                breaker.before_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    breaker.record(e)
+                    raise
+                except BaseException:
+                    breaker.abandon()
+                    raise
+                breaker.record()
+                return result
+            async_wrapper.breaker = breaker
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            breaker.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                breaker.record(e)
+                raise
+            except BaseException:
+                breaker.abandon()
+                raise
+            breaker.record()
+            return result
+        wrapper.breaker = breaker
+        return wrapper
+    return decorator
+
+
+# One breaker for every function that talks to users.db
+users_db_breaker = CircuitBreaker()
+
+
+@circuit_breaker(users_db_breaker)
+@with_db_connection
+@retry_on_failure(retries=3, delay=0.1)
+def fetch_users_guarded(conn):
+    """
+    Fetch all users, failing fast while users.db is unavailable.
+
+    Args:
+        conn (sqlite3.Connection): The active database connection.
+
+    Returns:
+        list: All rows from the users table.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+# Example usage
+if __name__ == "__main__":
+    try:
+        print(fetch_users_guarded())
+    except CircuitOpenError as e:
+        print(f"Skipped: {e}")
+    print(users_db_breaker.stats())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Task 6: Bulk Operations Decorator
+
+This script implements:
+1. bulk_operation - Lets a per-row write function run for many rows at once.
+2. bulk_calls - Context manager that collects calls and flushes them together.
+
+A function like update_user_email runs one UPDATE per call, each with its
+own connection, transaction and commit. bulk_operation records the
+statements the function would execute instead of running them, then sends
+them with executemany (one per run of identical SQL) inside a single
+`transactional` transaction:
+
+    update_user_email.bulk([(1, "a@x.com"), (2, "b@x.com")])
+
+    with bulk_calls():
+        for user_id, email in changes:
+            update_user_email(user_id=user_id, new_email=email)
+
+Only write functions qualify: while recording, the function gets a
+connection that accepts execute/executemany and nothing else.
+
+The function's own connection decorator is bypassed, so bulk writes go to
+users.db (joining an open `group_commit`) unless `connect` says otherwise:
+
+    @bulk_operation(connect=lambda: sqlite3.connect("other.db"))
+    @with_pooled_db_connection(database="other.db")
+    def update_other(conn, ...): ...
+"""
+
+import functools
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+
+tx = __import__('2-transactional')
+with_db_connection = tx.with_db_connection
+transactional = tx.transactional
+
+_local = threading.local()
+
+
+class RecordingConnection:
+    """
+    Stand-in connection (and cursor) that records statements instead of
+    executing them.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self.statements.extend((sql, params) for params in seq_of_params)
+        return self
+
+    def __getattr__(self, name):
+        raise TypeError(
+            f"bulk operations can only execute statements (got .{name})")
+
+
+def record(calls):
+    """
+    Runs (function, args, kwargs) calls against a RecordingConnection and
+    returns [(sql, [params, ...]), ...] with consecutive identical SQL
+    merged, so statement order is preserved.
+    """
+    recorder = RecordingConnection()
+    for func, args, kwargs in calls:
+        func(recorder, *args, **kwargs)
+    groups = []
+    for sql, params in recorder.statements:
+        if groups and groups[-1][0] == sql:
+            groups[-1][1].append(params)
+        else:
+            groups.append((sql, [params]))
+    return groups
+
+
+@transactional
+def execute_groups(conn, groups):
+    """
+    Executes recorded statement groups with executemany in one transaction.
+
+    Returns:
+        int: Total number of rows changed.
+    """
+    cursor = conn.cursor()
+    changed = 0
+    for sql, params in groups:
+        cursor.executemany(sql, params)
+        changed += max(cursor.rowcount, 0)
+    return changed
+
+
+execute_groups_on_users_db = with_db_connection(execute_groups)
+
+
+def flush(calls, connect=None):
+    """
+    Records and executes the given calls as one transaction, on a
+    connection opened by connect() (default: users.db, see
+    with_db_connection).
+    """
+    groups = record(calls)
+    if not groups:
+        return 0
+    if connect is None:
+        return execute_groups_on_users_db(groups)
+    conn = connect()
+    try:
+        return execute_groups(conn, groups)
+    finally:
+        conn.close()
+
+
+def connection_databases(func):
+    """
+    Databases named by the connection decorators wrapping `func` (those
+    that expose a `database` attribute, like with_pooled_db_connection).
+    """
+    databases = []
+    while func is not None:
+        database = getattr(func, "database", None)
+        if database is not None:
+            databases.append(database)
+        func = getattr(func, "__wrapped__", None)
+    return databases
+
+
+@contextmanager
+def bulk_calls():
+    """
+    Context manager that collects calls to @bulk_operation functions made
+    in this thread and flushes them in one transaction per target database
+    on exit (nothing is written if the block raises). Nested blocks join
+    the outermost one.
+
+    Yields:
+        list: The collected (function, args, kwargs, connect) calls.
+    """
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        yield pending
+        return
+    pending = _local.pending = []
+    try:
+        yield pending
+    finally:
+        _local.pending = None
+    targets = {}
+    for func, args, kwargs, connect in pending:
+        targets.setdefault(connect, []).append((func, args, kwargs))
+    for connect, calls in targets.items():
+        flush(calls, connect)
+
+
+def bulk_operation(func=None, *, connect=None):
+    """
+    Decorator that makes a write function batchable.
+
+    Apply it outermost, over the usual connection/transaction decorators.
+    Plain calls behave exactly as before; inside bulk_calls() they are
+    collected (and return None), and func.bulk(rows) runs one call per
+    argument tuple (or kwargs dict) in a single executemany transaction.
+
+    Can be used bare (@bulk_operation) or configured
+    (@bulk_operation(connect=...)).
+
+    Args:
+        func (function): Function taking (conn, ...) once unwrapped.
+        connect (callable): Opens the connection bulk batches run on (it
+            is closed afterwards). Required when a connection decorator of
+            `func` targets a database other than users.db.
+
+    Returns:
+        function: The wrapped function, with a .bulk(rows) method.
+
+    Raises:
+        ValueError: If `func` connects to another database and no
+            `connect` is given.
+    """
+    if func is None:
+        return functools.partial(bulk_operation, connect=connect)
+
+    if connect is None:
+        others = [db for db in connection_databases(func)
+                  if os.path.abspath(db) != os.path.abspath("users.db")]
+        if others:
+            raise ValueError(
+                f"{func.__name__} connects to {others[0]}, but bulk "
+                "operations run on users.db; pass "
+                "bulk_operation(connect=...) to choose the database")
+    raw = inspect.unwrap(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        pending = getattr(_local, "pending", None)
+        if pending is None:
+            return func(*args, **kwargs)
+        pending.append((raw, args, kwargs, connect))
+        return None
+
+    def bulk(rows):
+        """
+        Runs the operation once per row in one transaction.
+
+        Args:
+            rows (iterable): Argument tuples or keyword dicts, one per call.
+
+        Returns:
+            int: Total number of rows changed.
+        """
+        return flush([
+            (raw, (), row) if isinstance(row, dict) else (raw, tuple(row), {})
+            for row in rows
+        ], connect)
+
+    wrapper.bulk = bulk
+    return wrapper
+
+
+@bulk_operation
+@with_db_connection
+@transactional
+def update_user_email(conn, user_id, new_email):
+    """
+    Update the email address of a user identified by their ID.
+
+    Args:
+        conn (sqlite3.Connection): The active database connection.
+        user_id (int): The ID of the user to update.
+        new_email (str): The new email address to set.
+
+    Returns:
+        None
+    """
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+# Example usage
+if __name__ == "__main__":
+    changed = update_user_email.bulk([
+        (1, 'Crawford_Cartwright@hotmail.com'),
+        (2, 'Dax_Kautzer@hotmail.com'),
+    ])
+    print(f"Updated {changed} rows")
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection pool for the decorators in this directory.
+
+Opening a sqlite3 connection per call pays for the file open, schema load
+and a cold page cache every time. SQLitePool keeps a bounded set of open
+connections per database path and hands them out one caller at a time;
+`with_pooled_db_connection` is a drop-in replacement for the
+`with_db_connection` decorator that borrows from it.
+
+Pooled connections also keep their compiled statements: sqlite3 caches
+prepared statements per connection (keyed by SQL text), and
+StatementCachingConnection sizes that cache and reports its hit rate.
+"""
+
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def tune_connection(conn, journal_mode="WAL", synchronous="NORMAL",
+                    busy_timeout_ms=5000):
+    """
+    Connection setup PRAGMAs for write-heavy use (usable as on_connect).
+
+    WAL lets readers run alongside a writer, and synchronous=NORMAL skips
+    the fsync on every commit (WAL is only synced at checkpoints), so a
+    commit costs a write instead of a disk flush. busy_timeout makes SQLite
+    wait for a lock instead of failing with "database is locked" at once.
+    Pass None to leave a setting alone.
+    """
+    if journal_mode is not None:
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    if synchronous is not None:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+    if busy_timeout_ms is not None:
+        conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    return conn
+
+
+class StatementCache:
+    """
+    Mirror of sqlite3's per-connection prepared-statement LRU.
+
+    sqlite3 compiles each distinct SQL text once and keeps the last
+    `size` (the connect() `cached_statements` argument) around; the
+    compiled statements themselves are not reachable from Python, so this
+    tracks the same LRU over the SQL texts to count hits and misses.
+    Leading/trailing whitespace is stripped so trivially different texts
+    share one compiled statement.
+    """
+
+    def __init__(self, size=128):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+
+    def prepare(self, sql):
+        """Records a use of `sql` and returns the text to execute."""
+        sql = sql.strip()
+        if sql in self._lru:
+            self._lru.move_to_end(sql)
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._lru[sql] = None
+            if len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+        return sql
+
+    def stats(self):
+        """Returns hits, misses, hit_rate and cached statement count."""
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "statements": len(self._lru)}
+
+
+class _CachingCursor:
+    """Cursor proxy that routes execute/executemany through a StatementCache."""
+
+    def __init__(self, cursor, statements):
+        self._cursor = cursor
+        self._statements = statements
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._statements.prepare(sql), params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._statements.prepare(sql), seq_of_params)
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class StatementCachingConnection:
+    """
+    sqlite3 connection proxy that counts prepared-statement cache hits.
+
+    Only pays off on connections that live across calls (pooled or
+    otherwise persistent); a fresh connection always starts cold.
+    """
+
+    def __init__(self, conn, cache_size=128):
+        self._conn = conn
+        self.statements = StatementCache(cache_size)
+
+    def cursor(self, *args, **kwargs):
+        return _CachingCursor(self._conn.cursor(*args, **kwargs), self.statements)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def connect_cached(database, cached_statements=128, **connect_kwargs):
+    """Opens a StatementCachingConnection with a `cached_statements` LRU."""
+    conn = sqlite3.connect(database, cached_statements=cached_statements,
+                           **connect_kwargs)
+    return StatementCachingConnection(conn, cached_statements)
+
+
+class SQLitePool:
+    """
+    Thread-safe pool of connections to one SQLite database.
+
+    - At most `max_size` connections are open; callers wait up to `timeout`
+      seconds for one to be returned (TimeoutError after that).
+    - Idle connections unused for `idle_timeout` seconds are closed.
+    - Thread affinity: a thread gets back the connection it used last when
+      that one is idle, so its page cache stays warm for the same caller.
+    - `on_connect(conn)` runs once for every new connection (e.g.
+      tune_connection for WAL / synchronous=NORMAL).
+    - With `statement_cache=N`, connections keep up to N prepared
+      statements and are StatementCachingConnection proxies; stats()
+      then includes the pool-wide statement hit rate.
+    A connection is only ever used by one thread at a time, so they are
+    opened with check_same_thread=False to allow handing them over.
+    """
+
+    def __init__(self, database, max_size=5, idle_timeout=300.0, timeout=30.0,
+                 on_connect=None, statement_cache=None, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self.statement_cache = statement_cache
+        self.connect_kwargs = connect_kwargs
+        self._statement_caches = {}  # id(conn) -> StatementCache
+        self._idle = []  # (conn, owner thread id, last used)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._retired = [0, 0]  # statement hits/misses of closed connections
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "expired": 0}
+
+    def _connect(self):
+        if self.statement_cache:
+            conn = connect_cached(self.database, self.statement_cache,
+                                  check_same_thread=False, **self.connect_kwargs)
+        else:
+            conn = sqlite3.connect(self.database, check_same_thread=False,
+                                   **self.connect_kwargs)
+        if self.on_connect:
+            self.on_connect(conn)
+        if self.statement_cache:
+            with self._cond:
+                self._statement_caches[id(conn)] = conn.statements
+        return conn
+
+    def _close(self, conn):
+        """Closes a connection and drops its statement counters (lock held)."""
+        conn.close()
+        self._open -= 1
+        cache = self._statement_caches.pop(id(conn), None)
+        if cache is not None:
+            self._retired[0] += cache.hits
+            self._retired[1] += cache.misses
+
+    def _expire_idle(self, now):
+        """Closes idle connections past idle_timeout (lock held)."""
+        keep = []
+        for entry in self._idle:
+            if now - entry[2] > self.idle_timeout:
+                self._close(entry[0])
+                self._stats["expired"] += 1
+            else:
+                keep.append(entry)
+        self._idle = keep
+
+    def acquire(self):
+        """Checks out a connection (reusing an idle one when possible)."""
+        me = threading.get_ident()
+        deadline = None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire_idle(now)
+                if self._idle:
+                    # own connection first, else the most recently used one
+                    index = next((i for i, e in enumerate(self._idle) if e[1] == me),
+                                 len(self._idle) - 1)
+                    conn = self._idle.pop(index)[0]
+                    self._stats["hits"] += 1
+                    return conn
+                if self._open < self.max_size:
+                    self._open += 1
+                    self._stats["misses"] += 1
+                    break
+                if deadline is None:
+                    deadline = now + self.timeout
+                    self._stats["waits"] += 1
+                if now >= deadline:
+                    raise TimeoutError(
+                        f"No pooled connection to {self.database} "
+                        f"within {self.timeout}s")
+                self._cond.wait(deadline - now)
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """
+        Returns a connection. Uncommitted work is rolled back, exactly as
+        closing the connection would have done.
+        """
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        with self._cond:
+            if discard:
+                self._close(conn)
+            else:
+                self._idle.append((conn, threading.get_ident(), time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection for the block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._cond:
+            for conn, _, _ in self._idle:
+                self._close(conn)
+            self._idle = []
+
+    def stats(self):
+        """
+        Returns hit/miss/wait/expiry counters and pool occupancy, plus
+        prepared-statement cache counters when statement_cache is set.
+        """
+        with self._cond:
+            stats = dict(self._stats, open=self._open, idle=len(self._idle),
+                         max_size=self.max_size)
+            if self.statement_cache:
+                hits = self._retired[0] + sum(
+                    c.hits for c in self._statement_caches.values())
+                misses = self._retired[1] + sum(
+                    c.misses for c in self._statement_caches.values())
+                total = hits + misses
+                stats.update(statement_hits=hits, statement_misses=misses,
+                             statement_hit_rate=hits / total if total else 0.0)
+            return stats
+
+
+# Options of the shared pools unless get_pool() is told otherwise: keep
+# prepared statements, since pooled connections outlive the calls.
+POOL_DEFAULTS = {"statement_cache": 128}
+
+_pools = {}  # path -> (pool, settings it was created with)
+_pools_lock = threading.Lock()
+
+
+def _pool_settings(database, options):
+    """Every SQLitePool setting (defaults filled in) for `options`."""
+    bound = inspect.signature(SQLitePool).bind(database, **options)
+    bound.apply_defaults()
+    settings = dict(bound.arguments)
+    settings.update(settings.pop("connect_kwargs"))
+    return settings
+
+
+def get_pool(database="users.db", **options):
+    """
+    Returns the process-wide pool for `database` (keyed by absolute path),
+    creating it with POOL_DEFAULTS updated by `options` (see SQLitePool)
+    on first use.
+
+    Raises:
+        ValueError: If the pool already exists and an option given here
+            differs from the one it was created with.
+    """
+    key = database if database == ":memory:" else os.path.abspath(database)
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry is None:
+            options = dict(POOL_DEFAULTS, **options)
+            pool = SQLitePool(database, **options)
+            _pools[key] = (pool, _pool_settings(database, options))
+            return pool
+        pool, settings = entry
+        conflicts = sorted(name for name, value in options.items()
+                           if settings.get(name) != value)
+        if conflicts:
+            raise ValueError(
+                f"Pool for {database} already exists with different "
+                + ", ".join(f"{name}={settings.get(name)!r}"
+                            for name in conflicts))
+        return pool
+
+
+def with_pooled_db_connection(func=None, *, database="users.db",
+                              **pool_options):
+    """
+    Decorator to manage database connections through the pool.
+
+    Same contract as `with_db_connection`: a connection to `users.db` (or
+    `database`) is injected as the first argument. It is borrowed from the
+    pool and handed back afterwards instead of being closed.
+
+    `pool_options` (see SQLitePool) configure the shared pool; every user
+    of one database must agree on them (see get_pool). By default pooled
+    connections keep 128 prepared statements and
+    get_pool(database).stats() reports their hit rate.
+
+    Usage:
+        @with_pooled_db_connection
+        def get_user_by_id(conn, user_id): ...
+
+        @with_pooled_db_connection(database="archive.db", max_size=10)
+        def get_archived_user(conn, user_id): ...
+    """
+    if func is None:
+        return functools.partial(with_pooled_db_connection, database=database,
+                                 **pool_options)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with get_pool(database, **pool_options).connection() as conn:
+            return func(conn, *args, **kwargs)
+    wrapper.database = database
+    return wrapper
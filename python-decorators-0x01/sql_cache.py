@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Shared query-result cache for the decorators in this directory.
+
+QueryCache is bounded (entry count and approximate bytes, LRU or LFU
+eviction), expires entries after a TTL, keys results by normalized SQL plus
+bound parameters, and drops every entry that reads a table as soon as a
+write to that table is committed (see `transactional` in 2-transactional.py).
+
+get_or_load() adds single-flight loading (concurrent misses for one key
+share a single execution) and optional stale-while-revalidate.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_SPACES = re.compile(r"\s+")
+_LITERAL = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+_WRITE_TABLE = re.compile(
+    r"^\s*(?:"
+    r"(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO"
+    r"|UPDATE(?:\s+OR\s+\w+)?"
+    r"|DELETE\s+FROM"
+    r"|(?:DROP|ALTER)\s+TABLE(?:\s+IF\s+EXISTS)?"
+    r")\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(query):
+    """
+    Collapses whitespace (outside quoted literals) and a trailing semicolon
+    so equivalent SQL shares a key.
+    """
+    parts = _LITERAL.split(query)
+    # odd indexes are the quoted literals captured by split(); keep them as is
+    for i in range(0, len(parts), 2):
+        parts[i] = _SPACES.sub(" ", parts[i])
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def tables_read(query):
+    """Lower-cased names of the tables a SELECT reads from."""
+    return {t.lower() for t in _READ_TABLES.findall(query)}
+
+
+def table_written(query):
+    """Lower-cased name of the table a write statement modifies, or None."""
+    match = _WRITE_TABLE.match(query)
+    return match.group(1).lower() if match else None
+
+
+def _freeze(value):
+    """Turns lists/dicts in bound parameters into hashable equivalents."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def make_key(query, args=(), kwargs=None):
+    """Cache key: normalized SQL plus every bound parameter."""
+    return (normalize_sql(query), _freeze(args), _freeze(kwargs or {}))
+
+
+class _Flight:
+    """One in-progress load that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Request coalescing: while fn() runs for a key, further calls for the
+    same key wait for it and share its result (or its exception).
+    """
+    BUSY = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn, wait=True):
+        """
+        Runs fn() unless a call for `key` is already in flight, in which case
+        its outcome is shared. With wait=False, returns SingleFlight.BUSY
+        instead of waiting for someone else's call.
+        Returns (result, leader) where leader tells whether fn() ran here.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if not wait:
+                return self.BUSY, False
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, False
+        try:
+            flight.result = fn()
+            return flight.result, True
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a result set (rows of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+class QueryCache:
+    """
+    Thread-safe result cache.
+
+    Args:
+        max_entries (int): Maximum number of cached results.
+        max_bytes (int): Maximum total estimated size of cached results.
+        ttl (float): Seconds an entry stays valid (None = until evicted).
+        policy (str): "lru" (least recently used) or "lfu" (least
+            frequently used) eviction.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=300.0,
+                 policy="lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = policy
+        # key -> [value, size, fresh_until, hits, tables, stale_until]
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._generations = {}  # table -> number of invalidations
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._flights = SingleFlight()
+        self._refreshing = set()  # flight keys with a background refresh
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0,
+                       "expirations": 0, "invalidations": 0,
+                       "stale_hits": 0, "coalesced": 0, "refresh_errors": 0}
+
+    def _remove(self, key):
+        _, size, _, _, tables, _ = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def _evict_one(self):
+        if self.policy == "lfu":
+            # fewest hits; ties go to the least recently used
+            victim = min(self._entries, key=lambda k: self._entries[k][3])
+        else:
+            victim = next(iter(self._entries))
+        self._remove(victim)
+        self._stats["evictions"] += 1
+
+    def lookup(self, key):
+        """
+        Returns (value, state) where state is "fresh", "stale" (past its
+        TTL but inside its stale window) or "miss" (value None).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[5] is not None and entry[5] <= now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, "miss"
+            self._entries.move_to_end(key)
+            entry[3] += 1
+            if entry[2] is not None and entry[2] <= now:
+                self._stats["stale_hits"] += 1
+                return entry[0], "stale"
+            self._stats["hits"] += 1
+            return entry[0], "fresh"
+
+    def get(self, key, default=None):
+        """Returns the fresh cached value for `key`, or `default`."""
+        value, state = self.lookup(key)
+        return value if state == "fresh" else default
+
+    def generations(self, tables):
+        """
+        Snapshot of the invalidation counters of `tables`; take it before
+        reading from the database and pass it to set().
+        """
+        with self._lock:
+            return tuple(sorted((t.lower(), self._generations.get(t.lower(), 0))
+                                for t in tables))
+
+    def set(self, key, value, tables=(), ttl=None, stale_ttl=0.0,
+            generations=None):
+        """
+        Stores `value` under `key`, tagged with the tables it was read from.
+        After `ttl` the entry turns stale and may still be served for
+        `stale_ttl` more seconds while it is refreshed.
+        Values larger than max_bytes are not cached, and neither are values
+        read before a write invalidated one of their tables (when the
+        `generations` snapshot taken before the read is out of date).
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        fresh_until = time.monotonic() + ttl if ttl is not None else None
+        stale_until = (fresh_until + (stale_ttl or 0.0)
+                       if fresh_until is not None else None)
+        tables = frozenset(t.lower() for t in tables)
+        with self._lock:
+            if generations is not None and generations != self.generations(tables):
+                return
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and (len(self._entries) >= self.max_entries
+                                     or self._bytes + size > self.max_bytes):
+                self._evict_one()
+            self._entries[key] = [value, size, fresh_until, 0, tables, stale_until]
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+
+    def get_or_load(self, key, loader, tables=(), ttl=None, stale_ttl=0.0,
+                    refresher=None):
+        """
+        Returns the cached value for `key`, calling loader() on a miss.
+
+        - Single flight: concurrent misses for the same key wait for one
+          loader() call and share its result (or exception).
+        - Stale-while-revalidate: a stale entry is returned immediately and
+          refreshed once. With `refresher` (a loader that opens its own
+          connection) the refresh runs in a background thread; otherwise
+          the first caller to see the stale entry refreshes it inline while
+          everyone else keeps getting the stale value.
+
+        Returns (value, loaded) where loaded tells whether loader() ran in
+        this call.
+        """
+        value, state = self.lookup(key)
+        if state == "fresh":
+            return value, False
+        generations = self.generations(tables)
+        # loads started before an invalidation are not joined by later callers
+        flight_key = (key, generations)
+
+        def load(fn):
+            result = fn()
+            self.set(key, result, tables=tables, ttl=ttl, stale_ttl=stale_ttl,
+                     generations=generations)
+            return result
+
+        if state == "stale":
+            if refresher is not None:
+                # claim the refresh before starting a thread, so a hot key
+                # read by many callers starts one thread, not one each
+                with self._lock:
+                    start = flight_key not in self._refreshing
+                    self._refreshing.add(flight_key)
+                if start:
+                    threading.Thread(target=self._refresh,
+                                     args=(flight_key, load, refresher),
+                                     daemon=True).start()
+                return value, False
+            try:
+                result, leader = self._flights.do(flight_key, lambda: load(loader),
+                                                  wait=False)
+            except Exception:
+                with self._lock:
+                    self._stats["refresh_errors"] += 1
+                return value, False
+            if result is SingleFlight.BUSY:
+                return value, False
+            return result, leader
+
+        result, leader = self._flights.do(flight_key, lambda: load(loader))
+        if not leader:
+            with self._lock:
+                self._stats["coalesced"] += 1
+        return result, leader
+
+    def _refresh(self, flight_key, load, refresher):
+        """Background refresh of a stale entry (at most one per key)."""
+        try:
+            self._flights.do(flight_key, lambda: load(refresher), wait=False)
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(flight_key)
+
+    def invalidate_tables(self, tables):
+        """Drops every entry that read from any of `tables`."""
+        with self._lock:
+            for table in {t.lower() for t in tables}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def invalidate_statements(self, statements):
+        """Drops entries that read tables modified by the given SQL statements."""
+        tables = {table_written(sql) for sql in statements} - {None}
+        if tables:
+            self.invalidate_tables(tables)
+
+    def clear(self):
+        """Empties the cache (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """Returns hit/miss/eviction/expiration/invalidation/coalescing counters and size."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+
+# Process-wide cache shared by cache_query and transactional.
+default_cache = QueryCache()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Unit tests for 6-bulk_operations.py.
+
+Covers:
+- func.bulk(rows) and bulk_calls() batching into one transaction
+- rollback of the whole batch on failure
+- choosing the target database (connect=) and rejecting a silent switch
+
+Runs offline against a temporary users.db.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from db_pool import with_pooled_db_connection
+
+bulk = __import__('6-bulk_operations')
+
+
+def emails(database="users.db"):
+    """id -> email of every user in `database`."""
+    conn = sqlite3.connect(database)
+    try:
+        return dict(conn.execute("SELECT id, email FROM users"))
+    finally:
+        conn.close()
+
+
+class TestBulkOperation(unittest.TestCase):
+    """Tests for bulk_operation and bulk_calls."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        for database in ("users.db", "other.db"):
+            conn = sqlite3.connect(database)
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                         "email TEXT UNIQUE)")
+            conn.executemany("INSERT INTO users (email) VALUES (?)",
+                             [("a@x.com",), ("b@x.com",), ("c@x.com",)])
+            conn.commit()
+            conn.close()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_bulk(self):
+        """bulk() applies every row and reports the rows changed."""
+        changed = bulk.update_user_email.bulk(
+            [(1, "a@y.com"), {"user_id": 2, "new_email": "b@y.com"}])
+        self.assertEqual(changed, 2)
+        self.assertEqual(emails(), {1: "a@y.com", 2: "b@y.com",
+                                    3: "c@x.com"})
+
+    def test_bulk_is_one_transaction(self):
+        """A failing row rolls back the rows before it."""
+        with self.assertRaises(sqlite3.IntegrityError):
+            bulk.update_user_email.bulk([(1, "a@y.com"), (2, "c@x.com")])
+        self.assertEqual(emails()[1], "a@x.com")
+
+    def test_bulk_calls(self):
+        """Calls in a bulk_calls block are deferred, then written."""
+        with bulk.bulk_calls() as pending:
+            self.assertIsNone(bulk.update_user_email(1, "a@y.com"))
+            bulk.update_user_email(user_id=3, new_email="c@y.com")
+            self.assertEqual(len(pending), 2)
+            self.assertEqual(emails()[1], "a@x.com")
+        self.assertEqual(emails(), {1: "a@y.com", 2: "b@x.com",
+                                    3: "c@y.com"})
+
+    def test_bulk_calls_discarded_on_error(self):
+        """Nothing is written when the block raises."""
+        with self.assertRaises(RuntimeError):
+            with bulk.bulk_calls():
+                bulk.update_user_email(1, "a@y.com")
+                raise RuntimeError("boom")
+        self.assertEqual(emails()[1], "a@x.com")
+
+    def test_only_writes_recorded(self):
+        """A function that reads cannot be batched."""
+        @bulk.bulk_operation
+        @bulk.with_db_connection
+        def read(conn):
+            return conn.cursor().fetchall()
+
+        with self.assertRaises(TypeError):
+            read.bulk([()])
+
+    def test_other_database_needs_connect(self):
+        """A pooled function on another database is rejected..."""
+        with self.assertRaises(ValueError):
+            @bulk.bulk_operation
+            @with_pooled_db_connection(database="other.db")
+            def update_other(conn, user_id, email):
+                conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                             (email, user_id))
+
+    def test_connect(self):
+        """...and written to the database connect() opens."""
+        @bulk.bulk_operation(connect=lambda: sqlite3.connect("other.db"))
+        @with_pooled_db_connection(database="other.db")
+        def update_other(conn, user_id, email):
+            conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                         (email, user_id))
+
+        self.assertEqual(update_other.bulk([(1, "a@y.com")]), 1)
+        self.assertEqual(emails("other.db")[1], "a@y.com")
+        self.assertEqual(emails()[1], "a@x.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Unit tests for db_pool.py.
+
+Covers:
+- SQLitePool reuse, thread affinity, timeout and rollback on release
+- get_pool options (defaults, conflicts)
+- with_pooled_db_connection statement-cache hit rate
+
+Runs offline against temporary SQLite files.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+import db_pool
+
+
+class PoolTestCase(unittest.TestCase):
+    """Provides a temporary users table and forgets shared pools."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmp.name, "users.db")
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INT)")
+        conn.executemany("INSERT INTO users (age) VALUES (?)",
+                         [(20,), (30,), (40,)])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        key = os.path.abspath(self.database)
+        entry = db_pool._pools.pop(key, None)
+        if entry is not None:
+            entry[0].close()
+        self.tmp.cleanup()
+
+
+class TestSQLitePool(PoolTestCase):
+    """Tests for SQLitePool."""
+
+    def test_reuse_and_affinity(self):
+        """A thread gets back the connection it returned."""
+        pool = db_pool.SQLitePool(self.database, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+        self.assertEqual(pool.stats()["misses"], 1)
+        pool.close()
+
+    def test_timeout(self):
+        """acquire raises TimeoutError while the pool stays exhausted."""
+        pool = db_pool.SQLitePool(self.database, max_size=1, timeout=0.05)
+        conn = pool.acquire()
+        errors = []
+
+        def acquire():
+            try:
+                pool.acquire()
+            except TimeoutError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join(5)
+        self.assertEqual(len(errors), 1)
+        pool.release(conn)
+        pool.close()
+
+    def test_rollback_on_release(self):
+        """Uncommitted work is rolled back when a connection is returned."""
+        pool = db_pool.SQLitePool(self.database, max_size=1)
+        with pool.connection() as conn:
+            conn.execute("DELETE FROM users")
+        with pool.connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        self.assertEqual(count, 3)
+        pool.close()
+
+
+class TestGetPool(PoolTestCase):
+    """Tests for get_pool and with_pooled_db_connection."""
+
+    def test_same_pool(self):
+        """One pool per database path, with the statement cache on."""
+        pool = db_pool.get_pool(self.database)
+        self.assertIs(db_pool.get_pool(self.database), pool)
+        self.assertEqual(pool.statement_cache, 128)
+
+    def test_conflicting_options(self):
+        """Options differing from the existing pool's raise ValueError."""
+        pool = db_pool.get_pool(self.database, max_size=2)
+        self.assertIs(db_pool.get_pool(self.database, max_size=2), pool)
+        self.assertIs(db_pool.get_pool(self.database,
+                                       statement_cache=128), pool)
+        with self.assertRaises(ValueError):
+            db_pool.get_pool(self.database, max_size=99)
+
+    def test_decorator_statement_hit_rate(self):
+        """Decorated calls reuse prepared statements across calls."""
+        @db_pool.with_pooled_db_connection(database=self.database)
+        def older_than(conn, age):
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE age > ?", (age,))
+            return cursor.fetchall()
+
+        for age in (10, 25, 35, 45):
+            older_than(age)
+        stats = db_pool.get_pool(self.database).stats()
+        self.assertEqual(stats["statement_misses"], 1)
+        self.assertEqual(stats["statement_hits"], 3)
+        self.assertEqual(stats["statement_hit_rate"], 0.75)
+
+    def test_decorator_pool_options(self):
+        """Pool options given to the decorator configure the pool."""
+        @db_pool.with_pooled_db_connection(database=self.database,
+                                           max_size=1)
+        def count(conn):
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+        self.assertEqual(count(), 3)
+        self.assertEqual(db_pool.get_pool(self.database).max_size, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Unit tests for sql_cache.py.
+
+Covers:
+- normalize_sql / make_key / table parsing
+- QueryCache eviction, TTL and per-table invalidation
+- results read before an invalidation are not cached
+- single-flight loading and background refresh
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import sql_cache
+
+
+class TestSqlParsing(unittest.TestCase):
+    """Tests for the SQL helpers."""
+
+    def test_normalize_sql(self):
+        """Whitespace outside literals is collapsed."""
+        for query, expected in [
+            ("SELECT *\n  FROM users;", "SELECT * FROM users"),
+            ("SELECT * FROM users WHERE name = 'a  b'",
+             "SELECT * FROM users WHERE name = 'a  b'"),
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(sql_cache.normalize_sql(query), expected)
+
+    def test_literals_stay_in_key(self):
+        """Queries differing only inside a literal get different keys."""
+        self.assertNotEqual(
+            sql_cache.make_key("SELECT * FROM users WHERE name = 'a  b'"),
+            sql_cache.make_key("SELECT * FROM users WHERE name = 'a b'"))
+
+    def test_table_written(self):
+        """The written table is found for INSERT/UPDATE/DELETE."""
+        for query, expected in [
+            ("INSERT INTO users VALUES (1)", "users"),
+            ("update Users set age = 1", "users"),
+            ("DELETE FROM audit", "audit"),
+            ("SELECT * FROM users", None),
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(sql_cache.table_written(query), expected)
+
+    def test_tables_read(self):
+        """FROM and JOIN tables are read."""
+        self.assertEqual(
+            sql_cache.tables_read("SELECT * FROM users u JOIN audit a ON 1"),
+            {"users", "audit"})
+
+
+class TestQueryCache(unittest.TestCase):
+    """Tests for QueryCache."""
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = sql_cache.QueryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")),
+                         (1, None, 3))
+
+    def test_lfu_eviction(self):
+        """The least frequently used entry is evicted first."""
+        cache = sql_cache.QueryCache(max_entries=2, policy="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.set("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+
+    def test_ttl(self):
+        """Entries expire after their TTL."""
+        cache = sql_cache.QueryCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalidate_statements(self):
+        """A write drops the entries reading its table only."""
+        cache = sql_cache.QueryCache()
+        cache.set("users", [1], tables={"users"})
+        cache.set("audit", [2], tables={"audit"})
+        cache.invalidate_statements(["UPDATE users SET age = 1"])
+        self.assertNotIn("users", cache)
+        self.assertIn("audit", cache)
+
+    def test_read_before_invalidation_not_cached(self):
+        """set() ignores results read before their table was invalidated."""
+        cache = sql_cache.QueryCache()
+        generations = cache.generations({"users"})
+        cache.invalidate_tables({"users"})
+        cache.set("users", [1], tables={"users"}, generations=generations)
+        self.assertNotIn("users", cache)
+
+    def test_stale_while_revalidate(self):
+        """A stale entry is served while one caller refreshes it."""
+        cache = sql_cache.QueryCache()
+        cache.get_or_load("k", lambda: 1, ttl=0, stale_ttl=60)
+        value, loaded = cache.get_or_load("k", lambda: 2, ttl=60)
+        self.assertEqual((value, loaded), (2, True))
+        self.assertEqual(cache.get("k"), 2)
+
+    def test_coalesced_misses(self):
+        """Concurrent misses for one key run the loader once."""
+        cache = sql_cache.QueryCache()
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return [1]
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(cache.get_or_load("k", loader)))
+            for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(loaded for _, loaded in results),
+                         [False] * 9 + [True])
+        self.assertEqual(cache.stats()["coalesced"], 9)
+
+    def test_load_after_invalidation_not_joined(self):
+        """A miss after an invalidation does not share an older load."""
+        cache = sql_cache.QueryCache()
+        started, release = threading.Event(), threading.Event()
+
+        def old_loader():
+            started.set()
+            release.wait(5)
+            return "old"
+
+        thread = threading.Thread(target=cache.get_or_load,
+                                  args=("k", old_loader, {"users"}))
+        thread.start()
+        started.wait(5)
+        cache.invalidate_tables({"users"})
+        value, loaded = cache.get_or_load("k", lambda: "new", {"users"})
+        release.set()
+        thread.join(5)
+        self.assertEqual((value, loaded), ("new", True))
+        self.assertEqual(cache.get("k"), "new")
+
+    def test_background_refresh_starts_one_thread(self):
+        """Many stale reads of one key start a single refresh thread."""
+        cache = sql_cache.QueryCache()
+        cache.get_or_load("k", lambda: 1, ttl=0, stale_ttl=60)
+        release = threading.Event()
+        refreshes = []
+
+        def refresher():
+            refreshes.append(1)
+            release.wait(5)
+            return 2
+
+        with patch.object(sql_cache.threading, "Thread",
+                          wraps=threading.Thread) as thread_class:
+            for _ in range(200):
+                value, _ = cache.get_or_load("k", lambda: 3, ttl=60,
+                                             refresher=refresher)
+                self.assertEqual(value, 1)
+        release.set()
+        deadline = time.monotonic() + 5
+        while cache.get("k") != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(thread_class.call_count, 1)
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(cache.get("k"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
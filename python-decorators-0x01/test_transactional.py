@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Unit tests for 2-transactional.py.
+
+Covers:
+- commit / rollback of a transactional call
+- cache invalidation for statements run after a nested transactional call
+- group_commit batching, rollback and the max_ms deadline
+
+Runs offline against a temporary users.db.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import sql_cache
+
+tx = __import__('2-transactional')
+cached = __import__('4-cache_query')
+
+
+@tx.transactional
+def log_audit(conn, message):
+    """Nested transactional helper on the caller's connection."""
+    conn.execute("INSERT INTO audit (message) VALUES (?)", (message,))
+
+
+@tx.with_db_connection
+@tx.transactional
+def delete_user(conn, user_id):
+    """Calls a nested transactional helper, then writes users."""
+    log_audit(conn, f"delete {user_id}")
+    conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+
+
+@tx.with_db_connection
+@tx.transactional
+def add_audit(conn, message):
+    """Single write."""
+    conn.execute("INSERT INTO audit (message) VALUES (?)", (message,))
+
+
+@tx.with_db_connection
+@tx.transactional
+def failing_insert(conn):
+    """Writes, then fails."""
+    conn.execute("INSERT INTO users (name) VALUES ('ghost')")
+    raise RuntimeError("boom")
+
+
+def count(table):
+    """Rows in `table` of the temporary users.db."""
+    conn = sqlite3.connect("users.db")
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TransactionalTestCase(unittest.TestCase):
+    """Runs each test in a temporary directory holding users.db."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        conn = sqlite3.connect("users.db")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("CREATE TABLE audit (message TEXT)")
+        conn.executemany("INSERT INTO users (name) VALUES (?)",
+                         [(n,) for n in "abcde"])
+        conn.commit()
+        conn.close()
+        sql_cache.default_cache.clear()
+
+    def tearDown(self):
+        sql_cache.default_cache.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+
+class TestTransactional(TransactionalTestCase):
+    """Tests for the transactional decorator."""
+
+    def test_rollback(self):
+        """A failing call leaves nothing behind."""
+        with self.assertRaises(RuntimeError):
+            failing_insert()
+        self.assertEqual(count("users"), 5)
+
+    def test_nested_call_keeps_outer_trace(self):
+        """Writes after a nested call still invalidate cached reads."""
+        query = "SELECT * FROM users"
+        self.assertEqual(len(cached.fetch_users_with_cache(query=query)), 5)
+        delete_user(1)
+        self.assertEqual(count("users"), 4)
+        self.assertEqual(count("audit"), 1)
+        self.assertEqual(len(cached.fetch_users_with_cache(query=query)), 4)
+
+    def test_traced_nesting(self):
+        """Nested traced() blocks share the outer block's callback."""
+        conn = sqlite3.connect("users.db")
+        with tx.traced(conn) as outer:
+            conn.execute("SELECT 1")
+            with tx.traced(conn) as inner:
+                conn.execute("SELECT 2")
+            conn.execute("SELECT 3")
+        conn.execute("SELECT 4")
+        conn.close()
+        self.assertEqual(outer, ["SELECT 1", "SELECT 2", "SELECT 3"])
+        self.assertEqual(inner, ["SELECT 2"])
+
+
+class TestGroupCommit(TransactionalTestCase):
+    """Tests for group_commit."""
+
+    def test_batches(self):
+        """Calls are committed max_ops at a time and on exit."""
+        with tx.group_commit(max_ops=2, max_ms=60000) as group:
+            for n in range(3):
+                add_audit(f"entry {n}")
+        self.assertEqual(group.stats, {"ops": 3, "batches": 2,
+                                       "rolled_back": 0})
+        self.assertEqual(count("audit"), 3)
+
+    def test_rollback_pending_batch(self):
+        """A failure rolls back the pending batch only."""
+        with self.assertRaises(RuntimeError):
+            with tx.group_commit(max_ops=2, max_ms=60000):
+                for n in range(3):
+                    add_audit(f"entry {n}")
+                failing_insert()
+        self.assertEqual(count("audit"), 2)
+        self.assertEqual(count("users"), 5)
+
+    def test_max_ms_checked_when_call_starts(self):
+        """An old batch is committed before the next call runs."""
+        with tx.group_commit(max_ops=100, max_ms=20) as group:
+            add_audit("first")
+            time.sleep(0.05)
+            with self.assertRaises(RuntimeError):
+                failing_insert()
+            self.assertEqual(count("audit"), 1)
+        self.assertEqual(group.stats["batches"], 1)
+
+    def test_commit_if_due(self):
+        """commit_if_due() commits an old batch between calls."""
+        with tx.group_commit(max_ops=100, max_ms=20) as group:
+            add_audit("first")
+            group.commit_if_due()
+            self.assertEqual(count("audit"), 0)
+            time.sleep(0.05)
+            group.commit_if_due()
+            self.assertEqual(count("audit"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,9 @@
 # 0-stream_users.py
+import json
+import os
+import queue
+import threading
+import uuid
 import seed
 
 def stream_users():
@@ -14,7 +19,7 @@ def stream_users():
         cur.execute("SELECT user_id, name, email, age FROM user_data")
         for row in cur:   # one loop
             yield {
-                "user_id": row["user_id"],
+                "user_id": seed.user_id_from_db(row["user_id"]),
                 "name": row["name"],
                 "email": row["email"],
                 "age": int(row["age"]),
@@ -25,3 +30,249 @@ def stream_users():
         except Exception:
             pass
         conn.close()
+
+
+def _key_extent():
+    """Smallest and largest stored user_id (None, None for an empty table)."""
+    conn = seed.connect_to_prodev()
+    if not conn:
+        raise seed.Error("could not connect to ALX_prodev")
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT MIN(user_id), MAX(user_id) FROM user_data")
+        lo, hi = cur.fetchone()
+        cur.close()
+        return lo, hi
+    finally:
+        conn.close()
+
+
+def _key_to_int(key):
+    """Stored user_id (BINARY(16) bytes or UUID text) as a 128-bit int."""
+    if isinstance(key, (bytes, bytearray)):
+        return int.from_bytes(key, "big")
+    return uuid.UUID(key).int
+
+
+def _int_to_key(value, like):
+    """Inverse of _key_to_int, in the same stored form as `like`."""
+    if isinstance(like, (bytes, bytearray)):
+        return value.to_bytes(16, "big")
+    return str(uuid.UUID(int=value))
+
+
+def key_ranges(partitions, extent=None):
+    """
+    Splits the user_id keyspace into `partitions` half-open ranges
+    [lo, hi) of stored key values; the first lo and last hi are None, so
+    every key falls into exactly one range.
+
+    Bounds are spread evenly between the table's MIN(user_id) and
+    MAX(user_id) (`extent`, queried when not given), so both random (v4)
+    and time-ordered (v7) ids split into ranges of similar size. Without
+    usable UUID bounds (empty table, non-UUID keys) fixed hex prefixes
+    are used.
+    """
+    lo, hi = extent if extent is not None else _key_extent()
+    try:
+        start, end = _key_to_int(lo), _key_to_int(hi)
+    except (TypeError, ValueError, AttributeError):
+        start = end = None
+    if start is not None and end > start:
+        bounds = [_int_to_key(start + (end - start) * i // partitions, lo)
+                  for i in range(1, partitions)]
+    else:
+        bounds = [seed.key_bound(format(i * 0x10000 // partitions, "04x"))
+                  for i in range(1, partitions)]
+    bounds = sorted(set(bounds))
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def _scan_range(lo, hi, ordered, chunk_size, out, stop):
+    """
+    Thread body: streams one key range on its own connection and puts
+    lists of user dicts on `out`, then seed.DONE (or a seed.Failure).
+    """
+    conn = seed.connect_to_prodev(pooled=False)
+    exhausted = False
+    try:
+        if not conn:
+            raise seed.Error("could not connect to ALX_prodev")
+        conditions, params = [], []
+        if lo is not None:
+            conditions.append("user_id >= %s")
+            params.append(lo)
+        if hi is not None:
+            conditions.append("user_id < %s")
+            params.append(hi)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        order = " ORDER BY user_id" if ordered else ""
+        cur = conn.cursor(buffered=False)
+        cur.execute(
+            f"SELECT user_id, name, email, age FROM user_data{where}{order}",
+            tuple(params)
+        )
+        while not stop.is_set():
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                exhausted = True
+                break
+            chunk = [
+                {"user_id": seed.user_id_from_db(u), "name": n, "email": e,
+                 "age": int(a)}
+                for u, n, e, a in rows
+            ]
+            if not seed.put_until_stopped(out, stop, chunk):
+                break
+        if exhausted:
+            seed.put_until_stopped(out, stop, seed.DONE)
+    except Exception as e:
+        seed.put_until_stopped(out, stop, seed.Failure(e))
+    finally:
+        if conn:
+            if exhausted:
+                cur.close()
+                conn.close()
+            else:
+                getattr(conn, "shutdown", conn.close)()
+
+
+def stream_users_parallel(partitions=4, ordered=False, chunk_size=1000,
+                          buffer_chunks=4):
+    """
+    Generator that scans user_data in parallel: the user_id keyspace is
+    split into `partitions` ranges (see key_ranges), each streamed on its
+    own connection and thread, and the rows are merged into one stream of
+    dicts. With ordered=True rows come out in user_id order (ranges are
+    read ahead in parallel but yielded one after another); otherwise they
+    are yielded as soon as any range produces them.
+    Each range buffers at most `buffer_chunks` chunks of `chunk_size` rows.
+    """
+    stop = threading.Event()
+    ranges = key_ranges(partitions)
+    if ordered:
+        queues = [queue.Queue(maxsize=buffer_chunks) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=buffer_chunks * partitions)
+        queues = [shared] * len(ranges)
+    threads = [
+        threading.Thread(target=_scan_range,
+                         args=(lo, hi, ordered, chunk_size, out, stop),
+                         daemon=True)
+        for (lo, hi), out in zip(ranges, queues)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        pending = len(threads)
+        current = 0
+        while pending:
+            item = queues[current].get()
+            if item is seed.DONE:
+                pending -= 1
+                if ordered:
+                    current += 1
+            elif isinstance(item, seed.Failure):
+                raise item.error
+            else:
+                yield from item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+
+class CheckpointStore:
+    """
+    Tiny JSON-file store of named checkpoints for incremental scans.
+    Each checkpoint is an (updated_at, user_id) position; writes are
+    atomic (temp file + rename) so a crash never leaves a torn file.
+    """
+
+    def __init__(self, path="user_data.checkpoints.json"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self, name):
+        """Returns the checkpoint dict saved under `name`, or None."""
+        with self._lock:
+            return self._read().get(name)
+
+    def save(self, name, checkpoint):
+        """Stores `checkpoint` under `name`."""
+        with self._lock:
+            data = self._read()
+            data[name] = checkpoint
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+
+def stream_changed_users(store, name="stream_users", batch_size=1000,
+                         settle_seconds=1.0):
+    """
+    Generator that yields only the users inserted or modified since the
+    checkpoint `name` in `store`, as dicts with their updated_at, walking
+    the (updated_at, user_id) index in keyset order.
+
+    The checkpoint advances once a batch has been fully consumed, so an
+    interrupted run resumes where it stopped. Rows changed in the last
+    `settle_seconds` are left for the next run, giving in-flight
+    transactions time to commit so their timestamps are not skipped.
+    """
+    checkpoint = store.load(name) or {}
+    last_ts = checkpoint.get("updated_at")
+    last_id = checkpoint.get("user_id", "")
+    conn = seed.connect_to_prodev()
+    if not conn:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT NOW(6) - INTERVAL %s MICROSECOND",
+            (int(settle_seconds * 1000000),)
+        )
+        (upper,) = cur.fetchone()
+        cur.close()
+        while True:  # one loop
+            cur = conn.cursor(dictionary=True)
+            if last_ts is None:
+                cur.execute(
+                    "SELECT user_id, name, email, age, updated_at FROM user_data "
+                    "WHERE updated_at <= %s "
+                    "ORDER BY updated_at, user_id LIMIT %s",
+                    (upper, batch_size)
+                )
+            else:
+                cur.execute(
+                    "SELECT user_id, name, email, age, updated_at FROM user_data "
+                    "WHERE (updated_at > %s OR (updated_at = %s AND user_id > %s)) "
+                    "AND updated_at <= %s "
+                    "ORDER BY updated_at, user_id LIMIT %s",
+                    (last_ts, last_ts, seed.user_id_to_db(last_id), upper,
+                     batch_size)
+                )
+            rows = cur.fetchall()
+            cur.close()
+            if not rows:
+                break
+            for r in rows:
+                yield {
+                    "user_id": seed.user_id_from_db(r["user_id"]),
+                    "name": r["name"],
+                    "email": r["email"],
+                    "age": int(r["age"]),
+                    "updated_at": r["updated_at"],
+                }
+            last_ts = rows[-1]["updated_at"].isoformat(sep=" ")
+            last_id = seed.user_id_from_db(rows[-1]["user_id"])
+            store.save(name, {"updated_at": last_ts, "user_id": last_id})
+    finally:
+        conn.close()
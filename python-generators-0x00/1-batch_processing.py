@@ -1,49 +1,154 @@
 # 1-batch_processing.py
+import itertools
+from array import array
 import seed
 
-def stream_users_in_batches(batch_size):
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; array('H') is used instead
+    np = None
+
+ROW_COLUMNS = "user_id, name, email, age"
+# Columnar batches ask MySQL for integer ages so no per-row Decimal casts.
+COLUMNAR_COLUMNS = "user_id, name, email, CAST(age AS UNSIGNED) AS age"
+
+
+def to_columns(page):
+    """
+    Transposes a page of (user_id, name, email, age) tuples into a
+    column-oriented batch: lists for the string columns and a NumPy uint16
+    array (or array('H') without NumPy) for age.
+    """
+    user_ids, names, emails, ages = zip(*page)
+    return {
+        "user_id": list(map(seed.user_id_from_db, user_ids)),
+        "name": list(names),
+        "email": list(emails),
+        "age": (np.array(ages, dtype=np.uint16) if np is not None
+                else array('H', ages)),
+    }
+
+
+def stream_users_in_batches(batch_size, keyset=False, resume_from=None,
+                            columnar=False, **filters):
     """
     Generator that yields lists (batches) of users as dicts.
     Uses one loop over pages and stops when a page is empty.
+
+    keyset=True seeks with `WHERE user_id > last ORDER BY user_id` instead
+    of LIMIT/OFFSET, so every page costs O(batch) regardless of depth.
+    Pass seed.resume_cursor(batch) of the last processed batch as
+    resume_from to restart a keyset walk right after it (resume_from
+    implies keyset=True).
+
+    columnar=True yields column-oriented batches instead (see to_columns).
+
+    Keyword filters such as age__gt=25 or email__endswith="@x.com" are
+    pushed down into the WHERE clause (see seed.compile_filters), so rows
+    that would be thrown away never leave MySQL.
     """
+    keyset = keyset or resume_from is not None
+    conditions, params = seed.compile_filters(filters)
     conn = seed.connect_to_prodev()
     if not conn:
         return
+    columns = COLUMNAR_COLUMNS if columnar else ROW_COLUMNS
     try:
         offset = 0
+        after = seed.decode_cursor(resume_from)
         while True:  # loop #1
-            cur = conn.cursor(dictionary=True)
-            cur.execute(
-                "SELECT user_id, name, email, age FROM user_data LIMIT %s OFFSET %s",
-                (batch_size, offset)
-            )
+            page_conditions, page_params = list(conditions), list(params)
+            if keyset and after is not None:
+                page_conditions.append("user_id > %s")
+                page_params.append(seed.user_id_to_db(after))
+            where = (" WHERE " + " AND ".join(page_conditions)
+                     if page_conditions else "")
+            cur = conn.cursor(dictionary=not columnar)
+            if keyset:
+                cur.execute(
+                    f"SELECT {columns} FROM user_data{where} "
+                    "ORDER BY user_id LIMIT %s",
+                    (*page_params, batch_size)
+                )
+            else:
+                cur.execute(
+                    f"SELECT {columns} FROM user_data{where} LIMIT %s OFFSET %s",
+                    (*page_params, batch_size, offset)
+                )
             page = cur.fetchall()
             cur.close()
             if not page:
                 break
-            # normalize ages to int
-            batch = [
-                {
-                    "user_id": r["user_id"],
-                    "name": r["name"],
-                    "email": r["email"],
-                    "age": int(r["age"]),
-                }
-                for r in page
-            ]
+            if columnar:
+                batch = to_columns(page)
+                after = batch["user_id"][-1]
+            else:
+                # normalize ages to int
+                batch = [
+                    {
+                        "user_id": seed.user_id_from_db(r["user_id"]),
+                        "name": r["name"],
+                        "email": r["email"],
+                        "age": int(r["age"]),
+                    }
+                    for r in page
+                ]
+                after = batch[-1]["user_id"]
             yield batch
             offset += batch_size
     finally:
         conn.close()
 
-def batch_processing(batch_size):
+def filter_columns(batch, mask):
+    """
+    Applies a boolean mask (NumPy array or any iterable of bools) to a
+    column-oriented batch and returns the selected rows as a new batch.
+    """
+    if np is not None and isinstance(mask, np.ndarray):
+        idx = np.flatnonzero(mask)
+        return {
+            "user_id": [batch["user_id"][i] for i in idx],
+            "name": [batch["name"][i] for i in idx],
+            "email": [batch["email"][i] for i in idx],
+            "age": batch["age"][idx],
+        }
+    mask = list(mask)
+    return {
+        "user_id": list(itertools.compress(batch["user_id"], mask)),
+        "name": list(itertools.compress(batch["name"], mask)),
+        "email": list(itertools.compress(batch["email"], mask)),
+        "age": array('H', itertools.compress(batch["age"], mask)),
+    }
+
+def batch_processing(batch_size, columnar=False, pushdown=False):
     """
     Processes each batch to filter users over age 25 and prints them.
     Total loops:
       - for batch in generator (loop #2)
       - for user in filtered list (loop #3)
+
+    columnar=True filters each batch with one vectorized age mask.
+    pushdown=True lets MySQL apply `age > 25` (using the age index).
     """
-    for batch in stream_users_in_batches(batch_size):      # loop #2
-        filtered = [u for u in batch if u["age"] > 25]
+    filters = {"age__gt": 25} if pushdown else {}
+    for batch in stream_users_in_batches(batch_size, columnar=columnar,
+                                         **filters):  # loop #2
+        if columnar:
+            ages = batch["age"]
+            if pushdown:
+                kept = batch
+            elif np is not None:
+                kept = filter_columns(batch, ages > 25)
+            else:
+                kept = filter_columns(batch, map((25).__lt__, ages))
+            filtered = [
+                {"user_id": u, "name": n, "email": e, "age": int(a)}
+                for u, n, e, a in zip(kept["user_id"], kept["name"],
+                                      kept["email"], kept["age"])
+            ]
+        elif pushdown:
+            filtered = batch
+        else:
+            filtered = [u for u in batch if u["age"] > 25]
         for user in filtered:                              # loop #3
             print(user)
@@ -1,4 +1,6 @@
 # 2-lazy_paginate.py
+import queue
+import threading
 import seed
 
 def paginate_users(page_size, offset):
@@ -19,7 +21,7 @@ def paginate_users(page_size, offset):
         cur.close()
         return [
             {
-                "user_id": r["user_id"],
+                "user_id": seed.user_id_from_db(r["user_id"]),
                 "name": r["name"],
                 "email": r["email"],
                 "age": int(r["age"]),
@@ -30,19 +32,170 @@ def paginate_users(page_size, offset):
         conn.close()
 
 
-def lazy_paginate(page_size):
+def paginate_users_after(page_size, after=None):
+    """
+    Fetch a single page of users ordered by user_id, starting right after
+    the given user_id (keyset/seek pagination; None = first page).
+    Returns a list of dict rows.
+    """
+    conn = seed.connect_to_prodev()
+    if not conn:
+        return []
+    try:
+        cur = conn.cursor(dictionary=True)
+        if after is None:
+            cur.execute(
+                "SELECT user_id, name, email, age FROM user_data "
+                "ORDER BY user_id LIMIT %s",
+                (page_size,)
+            )
+        else:
+            cur.execute(
+                "SELECT user_id, name, email, age FROM user_data "
+                "WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (seed.user_id_to_db(after), page_size)
+            )
+        rows = cur.fetchall()
+        cur.close()
+        return [
+            {
+                "user_id": seed.user_id_from_db(r["user_id"]),
+                "name": r["name"],
+                "email": r["email"],
+                "age": int(r["age"]),
+            }
+            for r in rows
+        ]
+    finally:
+        conn.close()
+
+
+def stream_pages(page_size, after=None, ordered=False):
+    """
+    Generator that yields pages from ONE connection and one unbuffered
+    (server-side, SSCursor-style) cursor via fetchmany(page_size).
+    Memory stays bounded by page_size and there is no per-page reconnect.
+    ordered=True (or a resume position) walks the table in user_id order.
+    """
+    conn = seed.connect_to_prodev()
+    if not conn:
+        return
+    exhausted = False
+    try:
+        cur = conn.cursor(dictionary=True, buffered=False)
+        if after is not None:
+            cur.execute(
+                "SELECT user_id, name, email, age FROM user_data "
+                "WHERE user_id > %s ORDER BY user_id",
+                (seed.user_id_to_db(after),)
+            )
+        elif ordered:
+            cur.execute(
+                "SELECT user_id, name, email, age FROM user_data ORDER BY user_id"
+            )
+        else:
+            cur.execute("SELECT user_id, name, email, age FROM user_data")
+        while True:  # one loop
+            rows = cur.fetchmany(page_size)
+            if not rows:
+                exhausted = True
+                break
+            yield [
+                {
+                    "user_id": seed.user_id_from_db(r["user_id"]),
+                    "name": r["name"],
+                    "email": r["email"],
+                    "age": int(r["age"]),
+                }
+                for r in rows
+            ]
+    finally:
+        if exhausted:
+            cur.close()
+            conn.close()
+        else:
+            # Consumer stopped early: unread rows are still on the wire and
+            # a normal close would drain them, so drop the socket instead.
+            getattr(conn, "shutdown", conn.close)()
+
+
+def prefetch_pages(pages, depth=2):
+    """
+    Generator that runs the `pages` iterator in a background thread and
+    keeps up to `depth` pages ready in a bounded queue, so the next
+    round-trip overlaps with the consumer's work on the current page.
+    The full queue applies backpressure; when the consumer stops early the
+    thread is told to stop, `pages` is closed and the thread is joined.
+    Exceptions raised while fetching are re-raised in the consumer.
+    """
+    buf = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for page in pages:
+                if not seed.put_until_stopped(buf, stop, page):
+                    break
+            else:
+                seed.put_until_stopped(buf, stop, seed.DONE)
+        except Exception as e:
+            seed.put_until_stopped(buf, stop, seed.Failure(e))
+        finally:
+            close = getattr(pages, "close", None)
+            if close:
+                close()
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+    try:
+        while True:  # one loop
+            item = buf.get()
+            if item is seed.DONE:
+                break
+            if isinstance(item, seed.Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def lazy_paginate(page_size, keyset=False, resume_from=None,
+                  single_connection=False, prefetch=0):
     """
     Generator that yields one page (list of users) at a time.
     Only one loop allowed.
+
+    keyset=True pages with paginate_users_after() instead of OFFSET;
+    resume_from takes a cursor from seed.resume_cursor(page) and implies
+    keyset=True.
+    single_connection=True streams every page from one server-side
+    cursor (see stream_pages) instead of querying per page.
+    prefetch=K fetches up to K pages ahead in a background thread (see
+    prefetch_pages).
     """
+    keyset = keyset or resume_from is not None
+    if prefetch:
+        yield from prefetch_pages(
+            lazy_paginate(page_size, keyset, resume_from, single_connection),
+            prefetch
+        )
+        return
     offset = 0
+    after = seed.decode_cursor(resume_from)
+    if single_connection:
+        yield from stream_pages(page_size, after, ordered=keyset)
+        return
     while True:  # one loop
-        page = paginate_users(page_size, offset)
+        if keyset:
+            page = paginate_users_after(page_size, after)
+        else:
+            page = paginate_users(page_size, offset)
         if not page:
             break
         yield page
         offset += page_size
+        after = page[-1]["user_id"]
 
 # Some checkers expect this exact symbol name:
 lazy_pagination = lazy_paginate
-
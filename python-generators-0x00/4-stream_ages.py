@@ -1,5 +1,14 @@
 # 4-stream_ages.py
+import collections
+import itertools
+import operator
 import seed
+from mysql.connector import Error
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; lists are used instead
+    np = None
 
 def stream_user_ages():
     """
@@ -35,5 +44,156 @@ def print_average_age():
     avg = (total / count) if count else 0
     print(f"Average age of users: {avg:.2f}")
 
+class RunningStats:
+    """
+    Single-pass (Welford/Chan) accumulator for count, mean, min, max,
+    population variance and a fixed-width histogram.
+    Feed it whole blocks (lists or NumPy arrays) with update_block() so the
+    per-value work happens in C rather than in Python arithmetic.
+    """
+
+    def __init__(self, bin_width=10):
+        self.bin_width = bin_width
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+
+    def update_block(self, values):
+        """Merges a block of values into the running statistics."""
+        n = len(values)
+        if not n:
+            return
+        if np is not None and isinstance(values, np.ndarray):
+            block_mean = float(values.mean())
+            block_m2 = float(values.var()) * n
+            lo, hi = int(values.min()), int(values.max())
+            counts = np.bincount(values // self.bin_width)
+            buckets = {
+                int(b) * self.bin_width: int(counts[b])
+                for b in np.flatnonzero(counts)
+            }
+        else:
+            total = sum(values)
+            block_mean = total / n
+            block_m2 = sum(map(operator.mul, values, values)) - total * block_mean
+            lo, hi = min(values), max(values)
+            counts = collections.Counter(
+                map(operator.floordiv, values, itertools.repeat(self.bin_width))
+            )
+            buckets = {b * self.bin_width: c for b, c in counts.items()}
+
+        # Chan et al. pairwise merge of (count, mean, M2)
+        combined = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * n / combined
+        self.m2 += block_m2 + delta * delta * self.count * n / combined
+        self.count = combined
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        for bucket, c in buckets.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + c
+
+    def update(self, value):
+        """Adds a single value."""
+        self.update_block([value])
+
+    def result(self):
+        """Returns the statistics as a dict."""
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "variance": self.m2 / self.count if self.count else 0.0,
+            "histogram": dict(sorted(self.histogram.items())),
+        }
+
+
+def stream_age_blocks(block_size=10000):
+    """
+    Generator that yields ages in blocks of up to block_size, as NumPy
+    uint16 arrays when NumPy is installed and as lists of ints otherwise.
+    """
+    conn = seed.connect_to_prodev()
+    if not conn:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT CAST(age AS UNSIGNED) FROM user_data")
+        while True:  # loop #1
+            rows = cur.fetchmany(block_size)
+            if not rows:
+                break
+            ages = itertools.chain.from_iterable(rows)
+            if np is not None:
+                yield np.fromiter(ages, dtype=np.uint16, count=len(rows))
+            else:
+                yield list(ages)
+    finally:
+        try:
+            cur.close()
+        except Exception:
+            pass
+        conn.close()
+
+
+def _sql_age_stats(bin_width):
+    """
+    Computes the age statistics inside MySQL (COUNT/AVG/MIN/MAX/VAR_POP and
+    a GROUP BY histogram) so only a handful of rows cross the wire.
+    Returns None if the database is unreachable.
+    """
+    conn = seed.connect_to_prodev()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT COUNT(*), AVG(age), MIN(age), MAX(age), VAR_POP(age) "
+            "FROM user_data"
+        )
+        count, mean, lo, hi, variance = cur.fetchone()
+        cur.execute(
+            "SELECT FLOOR(age / %s) * %s AS bucket, COUNT(*) FROM user_data "
+            "GROUP BY bucket ORDER BY bucket",
+            (bin_width, bin_width)
+        )
+        histogram = {int(bucket): int(c) for bucket, c in cur.fetchall()}
+        cur.close()
+        return {
+            "count": int(count),
+            "mean": float(mean) if count else 0.0,
+            "min": int(lo) if lo is not None else None,
+            "max": int(hi) if hi is not None else None,
+            "variance": float(variance) if count else 0.0,
+            "histogram": histogram,
+        }
+    finally:
+        conn.close()
+
+
+def age_stats(bin_width=10, pushdown=True, block_size=10000):
+    """
+    Returns count, mean, min, max, variance and a histogram (bucket start ->
+    count, buckets bin_width wide) of user_data.age.
+    With pushdown=True the aggregation runs in SQL; if that is disabled or
+    fails, ages are streamed in blocks into a RunningStats accumulator.
+    """
+    if pushdown:
+        try:
+            stats = _sql_age_stats(bin_width)
+            if stats is not None:
+                return stats
+        except Error as e:
+            print(f"SQL aggregation failed, streaming instead: {e}")
+    acc = RunningStats(bin_width)
+    for block in stream_age_blocks(block_size):
+        acc.update_block(block)
+    return acc.result()
+
+
 if __name__ == "__main__":
     print_average_age()
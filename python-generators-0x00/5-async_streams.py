@@ -0,0 +1,291 @@
+# 5-async_streams.py
+"""
+Async-generator versions of the user_data streams for asyncio services.
+
+The default backend is aiomysql with one shared pool per process; an
+aiosqlite-backed stand-in (SQLiteBackend) with the same interface lets the
+generators run without a MySQL server. Paged generators walk user_data in
+user_id order and prefetch the next page while the consumer works on the
+current one.
+"""
+import asyncio
+import seed
+
+try:
+    import aiomysql
+except ImportError:  # only needed for the MySQL backend
+    aiomysql = None
+
+try:
+    import aiosqlite
+except ImportError:  # only needed for the SQLite stand-in
+    aiosqlite = None
+
+COLUMNS = "user_id, name, email, age"
+
+
+class MySQLBackend:
+    """
+    aiomysql backend sharing one connection pool between all generators.
+    """
+    placeholder = "%s"
+
+    def __init__(self, minsize=1, maxsize=10):
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def pool(self):
+        """Creates the pool on first use and returns it."""
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    if aiomysql is None:
+                        raise RuntimeError("aiomysql is not installed")
+                    self._pool = await aiomysql.create_pool(
+                        host=seed.MYSQL_HOST,
+                        user=seed.MYSQL_USER,
+                        password=seed.MYSQL_PASSWORD,
+                        db="ALX_prodev",
+                        autocommit=True,
+                        minsize=self.minsize,
+                        maxsize=self.maxsize,
+                    )
+        return self._pool
+
+    def user_id_param(self, user_id):
+        """Converts a user_id string into its stored (CHAR/BINARY) form."""
+        return seed.user_id_to_db(user_id)
+
+    async def fetch(self, sql, params=()):
+        """Runs one query on a pooled connection and returns all rows."""
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchall()
+
+    async def stream(self, sql, params=(), size=1000):
+        """Async generator over rows of an unbuffered server-side cursor."""
+        pool = await self.pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSCursor) as cur:
+                await cur.execute(sql, params)
+                while True:
+                    rows = await cur.fetchmany(size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+
+    async def close(self):
+        """Closes the pool and waits for its connections to go away."""
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+
+class SQLiteBackend:
+    """
+    aiosqlite stand-in with the same interface as MySQLBackend, for tests
+    and offline runs. Holds a single connection to `path`.
+    """
+    placeholder = "?"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = None
+        self._lock = asyncio.Lock()
+
+    async def connection(self):
+        """Opens the connection on first use and returns it."""
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    if aiosqlite is None:
+                        raise RuntimeError("aiosqlite is not installed")
+                    self._conn = await aiosqlite.connect(self.path)
+        return self._conn
+
+    async def create_table(self, rows=()):
+        """Creates user_data and inserts (user_id, name, email, age) rows."""
+        conn = await self.connection()
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_data ("
+            "user_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+            "email TEXT NOT NULL, age INTEGER NOT NULL)"
+        )
+        await conn.executemany(
+            "INSERT OR IGNORE INTO user_data VALUES (?, ?, ?, ?)", list(rows)
+        )
+        await conn.commit()
+
+    def user_id_param(self, user_id):
+        """The stand-in always stores user_id as text."""
+        return user_id
+
+    async def fetch(self, sql, params=()):
+        """Runs one query and returns all rows."""
+        conn = await self.connection()
+        async with conn.execute(sql, params) as cur:
+            return await cur.fetchall()
+
+    async def stream(self, sql, params=(), size=1000):
+        """Async generator over the rows of a query, fetched in blocks."""
+        conn = await self.connection()
+        async with conn.execute(sql, params) as cur:
+            while True:
+                rows = await cur.fetchmany(size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+    async def close(self):
+        """Closes the connection."""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+_default_backend = None
+
+
+def default_backend():
+    """Returns the process-wide MySQL backend (created lazily)."""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = MySQLBackend()
+    return _default_backend
+
+
+async def close_default_backend():
+    """Closes the shared MySQL pool, e.g. on service shutdown."""
+    global _default_backend
+    if _default_backend is not None:
+        await _default_backend.close()
+        _default_backend = None
+
+
+def _to_user(row):
+    """Converts a (user_id, name, email, age) row into a user dict."""
+    return {
+        "user_id": seed.user_id_from_db(row[0]),
+        "name": row[1],
+        "email": row[2],
+        "age": int(row[3]),
+    }
+
+
+async def _fetch_page(backend, page_size, after):
+    """Fetches the page of users that follows user_id `after`."""
+    p = backend.placeholder
+    if after is None:
+        rows = await backend.fetch(
+            f"SELECT {COLUMNS} FROM user_data ORDER BY user_id LIMIT {p}",
+            (page_size,)
+        )
+    else:
+        rows = await backend.fetch(
+            f"SELECT {COLUMNS} FROM user_data WHERE user_id > {p} "
+            f"ORDER BY user_id LIMIT {p}",
+            (backend.user_id_param(after), page_size)
+        )
+    return [_to_user(r) for r in rows]
+
+
+async def _prefetched_pages(backend, page_size):
+    """
+    Async generator over keyset pages that starts fetching page N+1 before
+    yielding page N, so the round-trip overlaps the consumer's work.
+    """
+    pending = asyncio.ensure_future(_fetch_page(backend, page_size, None))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            if not page:
+                break
+            if len(page) == page_size:
+                pending = asyncio.ensure_future(
+                    _fetch_page(backend, page_size, page[-1]["user_id"])
+                )
+            yield page
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def stream_users(backend=None):
+    """
+    Async generator that yields rows from user_data one by one as dicts.
+    """
+    backend = backend or default_backend()
+    rows = backend.stream(f"SELECT {COLUMNS} FROM user_data")
+    try:
+        async for row in rows:
+            yield _to_user(row)
+    finally:
+        # `async for` does not close an async generator it stops reading
+        await rows.aclose()
+
+
+async def stream_users_in_batches(batch_size, backend=None):
+    """
+    Async generator that yields lists (batches) of users as dicts.
+    """
+    pages = _prefetched_pages(backend or default_backend(), batch_size)
+    try:
+        async for page in pages:
+            yield page
+    finally:
+        await pages.aclose()
+
+
+async def lazy_paginate(page_size, backend=None):
+    """
+    Async generator that yields one page (list of users) at a time.
+    """
+    pages = _prefetched_pages(backend or default_backend(), page_size)
+    try:
+        async for page in pages:
+            yield page
+    finally:
+        await pages.aclose()
+
+lazy_pagination = lazy_paginate
+
+
+async def stream_user_ages(backend=None):
+    """
+    Async generator that yields ages (as ints) one by one.
+    """
+    backend = backend or default_backend()
+    rows = backend.stream("SELECT age FROM user_data")
+    try:
+        async for (age,) in rows:
+            yield int(age)
+    finally:
+        await rows.aclose()
+
+
+async def _demo():
+    """Average age over an in-memory SQLite stand-in."""
+    backend = SQLiteBackend()
+    await backend.create_table(
+        (f"{i:08d}", f"user{i}", f"user{i}@example.com", 18 + i % 60)
+        for i in range(1000)
+    )
+    total = count = 0
+    async for age in stream_user_ages(backend):
+        total += age
+        count += 1
+    pages = [len(p) async for p in lazy_paginate(300, backend)]
+    await backend.close()
+    print(f"Average age of users: {total / count:.2f}, pages: {pages}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,235 @@
+# 6-columnar_snapshot.py
+"""
+Columnar snapshot of user_data for offline consumers.
+
+export_snapshot() streams the table (keyset, column-oriented batches) into
+a compact typed-array file, and Snapshot memory-maps it so readers slice
+columns without copying or re-querying MySQL.
+
+File layout (all arrays in the writer's native byte order):
+    b"UDSNAP01" | 8-byte aligned buffers ... | JSON footer |
+    footer length (uint64) | b"UDSNAP01"
+Columns:
+    user_id, email   utf8: <col>.offsets (uint64, rows + 1) + <col>.data
+    name             dictionary: name.codes (uint32) + name.dict_offsets
+                     (uint64) + name.dict_data (utf8 of distinct names)
+    age              age (uint16)
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+MAGIC = b"UDSNAP01"
+_ALIGN = 8
+
+
+class _Buffer:
+    """Append-only spill file for one typed buffer of the snapshot."""
+
+    def __init__(self, typecode):
+        self.typecode = typecode
+        self.file = tempfile.TemporaryFile()
+        self.length = 0
+
+    def append(self, data):
+        """Appends an array (of this buffer's type) or raw bytes."""
+        raw = data.tobytes() if isinstance(data, array) else data
+        self.file.write(raw)
+        self.length += len(raw)
+
+
+class _Utf8Column:
+    """Writes a string column as offsets + utf8 data buffers."""
+
+    def __init__(self, name, buffers):
+        self.offsets = buffers[f"{name}.offsets"] = _Buffer("Q")
+        self.data = buffers[f"{name}.data"] = _Buffer("B")
+        self.offsets.append(array("Q", [0]))
+
+    def extend(self, values):
+        encoded = [v.encode("utf-8") for v in values]
+        ends, end = array("Q"), self.data.length
+        for raw in encoded:
+            end += len(raw)
+            ends.append(end)
+        self.data.append(b"".join(encoded))
+        self.offsets.append(ends)
+
+
+class _DictColumn:
+    """Writes a string column as uint32 codes into a dictionary."""
+
+    def __init__(self, name, buffers):
+        self.name = name
+        self.codes = buffers[f"{name}.codes"] = _Buffer("I")
+        self.dictionary = {}
+        self.buffers = buffers
+
+    def extend(self, values):
+        dictionary = self.dictionary
+        self.codes.append(array("I", [
+            dictionary.setdefault(v, len(dictionary)) for v in values
+        ]))
+
+    def finish(self):
+        """Writes the dictionary (in code order) once all rows are in."""
+        words = _Utf8Column(f"{self.name}.dict", self.buffers)
+        words.extend(list(self.dictionary))
+
+
+def export_snapshot(path, batch_size=10000):
+    """
+    Streams user_data into a columnar snapshot file at `path`, holding at
+    most one batch plus the distinct names in memory. Returns the number
+    of rows written.
+    """
+    buffers = {}
+    user_ids = _Utf8Column("user_id", buffers)
+    names = _DictColumn("name", buffers)
+    emails = _Utf8Column("email", buffers)
+    ages = buffers["age"] = _Buffer("H")
+    rows = 0
+    try:
+        for batch in stream_users_in_batches(batch_size, keyset=True,
+                                             columnar=True):
+            user_ids.extend(batch["user_id"])
+            names.extend(batch["name"])
+            emails.extend(batch["email"])
+            ages.append(array("H", batch["age"]))
+            rows += len(batch["user_id"])
+        names.finish()
+
+        footer = {"rows": rows, "byteorder": sys.byteorder, "buffers": {}}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as out:
+            out.write(MAGIC)
+            for name, buf in buffers.items():
+                out.write(b"\0" * (-out.tell() % _ALIGN))
+                footer["buffers"][name] = {
+                    "offset": out.tell(),
+                    "length": buf.length,
+                    "type": buf.typecode,
+                }
+                buf.file.seek(0)
+                shutil.copyfileobj(buf.file, out)
+            raw_footer = json.dumps(footer).encode("utf-8")
+            out.write(raw_footer)
+            out.write(struct.pack("<Q", len(raw_footer)))
+            out.write(MAGIC)
+        os.replace(tmp, path)
+    finally:
+        for buf in buffers.values():
+            buf.file.close()
+    return rows
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot written by export_snapshot.
+    Column accessors return memoryview slices into the mapping (no copy);
+    strings are only decoded when a row is materialized.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffers = {}
+        if self._mm[:8] != MAGIC or self._mm[-8:] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a user_data snapshot: {path}")
+        (footer_len,) = struct.unpack("<Q", self._mm[-16:-8])
+        footer = json.loads(self._mm[-16 - footer_len:-16])
+        if footer["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError("Snapshot was written with a different byte order")
+        self.rows = footer["rows"]
+        with memoryview(self._mm) as view:
+            self._buffers = {
+                name: view[b["offset"]:b["offset"] + b["length"]].cast(b["type"])
+                for name, b in footer["buffers"].items()
+            }
+        self._names = None
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Releases the mapping (slices handed out must be released first)."""
+        for buf in self._buffers.values():
+            buf.release()
+        self._buffers = {}
+        self._mm.close()
+        self._file.close()
+
+    def ages(self, start=0, stop=None):
+        """uint16 memoryview over age[start:stop] (usable with np.frombuffer)."""
+        return self._buffers["age"][start:stop]
+
+    def name_codes(self, start=0, stop=None):
+        """uint32 memoryview over the dictionary codes of name[start:stop]."""
+        return self._buffers["name.codes"][start:stop]
+
+    def name_dictionary(self):
+        """The distinct names, indexed by code (decoded once, then cached)."""
+        if self._names is None:
+            self._names = self._strings("name.dict", 0, None)
+        return self._names
+
+    def _strings(self, column, start, stop):
+        offsets = self._buffers[f"{column}.offsets"]
+        data = self._buffers[f"{column}.data"]
+        count = len(offsets) - 1
+        start, stop, _ = slice(start, stop).indices(count)
+        return [
+            str(data[offsets[i]:offsets[i + 1]], "utf-8")
+            for i in range(start, stop)
+        ]
+
+    def user_ids(self, start=0, stop=None):
+        """Decoded user_id[start:stop]."""
+        return self._strings("user_id", start, stop)
+
+    def emails(self, start=0, stop=None):
+        """Decoded email[start:stop]."""
+        return self._strings("email", start, stop)
+
+    def iter_batches(self, batch_size=10000):
+        """
+        Generator of column-oriented batches shaped like
+        stream_users_in_batches(..., columnar=True), with age as a
+        zero-copy memoryview.
+        """
+        names = self.name_dictionary()
+        for start in range(0, self.rows, batch_size):
+            stop = min(start + batch_size, self.rows)
+            yield {
+                "user_id": self.user_ids(start, stop),
+                "name": [names[c] for c in self.name_codes(start, stop)],
+                "email": self.emails(start, stop),
+                "age": self.ages(start, stop),
+            }
+
+    def iter_rows(self, batch_size=10000):
+        """Generator of user dicts, like stream_users()."""
+        for batch in self.iter_batches(batch_size):
+            for u, n, e, a in zip(batch["user_id"], batch["name"],
+                                  batch["email"], batch["age"]):
+                yield {"user_id": u, "name": n, "email": e, "age": a}
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "user_data.snap"
+    print(f"Exported {export_snapshot(target)} rows to {target}")
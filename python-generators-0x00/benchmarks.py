@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+"""
+Ad-hoc benchmarks for the generators in this directory.
+
+Run against a seeded ALX_prodev database (e.g. 1M rows in user_data):
+    python3 benchmarks.py pagination 1000
+"""
+import sys
+import time
+import uuid
+import seed
+
+stream_users_mod = __import__('0-stream_users')
+batch_processing_mod = __import__('1-batch_processing')
+stream_users_in_batches = batch_processing_mod.stream_users_in_batches
+
+
+def _timed(label, rows_iter):
+    """Drains rows_iter (an iterable of batches) and prints rows/sec."""
+    start = time.perf_counter()
+    rows = 0
+    for batch in rows_iter:
+        rows += len(batch)
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0
+    print(f"{label:<24} {rows:>10} rows  {elapsed:8.2f}s  {rate:12.0f} rows/s")
+
+
+def bench_pagination(batch_size=1000):
+    """Full table walk with LIMIT/OFFSET vs keyset pagination."""
+    _timed("offset", stream_users_in_batches(batch_size))
+    _timed("keyset", stream_users_in_batches(batch_size, keyset=True))
+
+
+def bench_columnar(batch_size=10000):
+    """Row-dict batches + per-row filter vs columnar batches + age mask."""
+    _timed("rows, age > 25", (
+        [u for u in batch if u["age"] > 25]
+        for batch in stream_users_in_batches(batch_size, keyset=True)
+    ))
+    _timed("columnar, age > 25", (
+        batch_processing_mod.filter_columns(batch, batch["age"] > 25)["user_id"]
+        if batch_processing_mod.np is not None else
+        batch_processing_mod.filter_columns(
+            batch, map((25).__lt__, batch["age"]))["user_id"]
+        for batch in stream_users_in_batches(batch_size, keyset=True,
+                                             columnar=True)
+    ))
+
+
+def bench_parallel(partitions=4):
+    """Single-connection stream_users vs a range-partitioned parallel scan."""
+    _timed("stream_users", ([u] for u in stream_users_mod.stream_users()))
+    _timed(f"parallel x{partitions}", (
+        [u] for u in stream_users_mod.stream_users_parallel(partitions)
+    ))
+
+
+def bench_snapshot(batch_size=10000):
+    """Re-querying MySQL vs reading a memory-mapped columnar snapshot."""
+    snapshot_mod = __import__('6-columnar_snapshot')
+    path = "user_data.bench.snap"
+    start = time.perf_counter()
+    rows = snapshot_mod.export_snapshot(path, batch_size)
+    print(f"{'export snapshot':<24} {rows:>10} rows  "
+          f"{time.perf_counter() - start:8.2f}s")
+    _timed("mysql columnar", (
+        b["age"] for b in stream_users_in_batches(batch_size, keyset=True,
+                                                  columnar=True)
+    ))
+    snap = snapshot_mod.Snapshot(path)
+    _timed("snapshot ages", (
+        snap.ages(i, i + batch_size) for i in range(0, len(snap), batch_size)
+    ))
+    _timed("snapshot batches", (
+        b["user_id"] for b in snap.iter_batches(batch_size)
+    ))
+    snap.close()
+
+
+def bench_uuid_schema(rows=200000, chunk_size=5000):
+    """
+    Insert throughput and index size of CHAR(36)/UUIDv4 vs BINARY(16)/UUIDv7
+    keys, on scratch tables that are dropped afterwards.
+    """
+    conn = seed.connect_to_prodev(pooled=False)
+    variants = (
+        ("char36_uuid4", "CHAR(36)", lambda: str(uuid.uuid4())),
+        ("binary16_uuid7", "BINARY(16)", lambda: seed.uuid7().bytes),
+    )
+    try:
+        for name, id_type, new_id in variants:
+            table = f"user_data_bench_{name}"
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+                cur.execute(
+                    f"CREATE TABLE {table} (user_id {id_type} PRIMARY KEY, "
+                    "name VARCHAR(255) NOT NULL, email VARCHAR(255) NOT NULL, "
+                    "age DECIMAL(3,0) NOT NULL, INDEX (age)) ENGINE=InnoDB"
+                )
+                start = time.perf_counter()
+                for chunk in seed.iter_chunks(range(rows), chunk_size):
+                    cur.executemany(
+                        f"INSERT INTO {table} VALUES (%s, %s, %s, %s)",
+                        [(new_id(), f"user{i}", f"user{i}@example.com", i % 90)
+                         for i in chunk]
+                    )
+                elapsed = time.perf_counter() - start
+                cur.execute(f"ANALYZE TABLE {table}")
+                cur.fetchall()
+                cur.execute(
+                    "SELECT data_length, index_length FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    (table,)
+                )
+                data_len, index_len = cur.fetchone()
+                cur.execute(f"DROP TABLE {table}")
+            print(f"{name:<24} {rows / elapsed:10.0f} rows/s  "
+                  f"data {data_len / 2**20:8.1f} MiB  "
+                  f"secondary indexes {index_len / 2**20:8.1f} MiB")
+    finally:
+        conn.close()
+
+
+BENCHMARKS = {
+    "pagination": bench_pagination,
+    "columnar": bench_columnar,
+    "parallel": bench_parallel,
+    "snapshot": bench_snapshot,
+    "uuid_schema": bench_uuid_schema,
+}
+
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "pagination"
+    args = [int(a) for a in sys.argv[2:]]
+    BENCHMARKS[name](*args)
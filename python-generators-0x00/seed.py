@@ -1,5 +1,10 @@
 # seed.py
+import base64
 import csv
+import itertools
+import queue
+import threading
+import time
 import uuid
 import os
 import mysql.connector
@@ -11,6 +16,54 @@ MYSQL_USER = os.getenv("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "")
 # --------------------------------------
 
+# PRODEV_BINARY_UUID=1 stores user_id as BINARY(16) holding time-ordered
+# UUIDv7s instead of CHAR(36); the generators still see string ids.
+BINARY_USER_IDS = os.getenv("PRODEV_BINARY_UUID", "0") == "1"
+
+def uuid7():
+    """
+    Returns a time-ordered UUID (version 7): 48-bit Unix milliseconds
+    followed by random bits, so new keys append to the end of the index.
+    """
+    ms = time.time_ns() // 1000000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (ms & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76
+        | (rand >> 68) << 64
+        | 0x2 << 62
+        | rand & 0x3FFFFFFFFFFFFFFF
+    )
+    return uuid.UUID(int=value)
+
+def new_user_id():
+    """
+    Returns a fresh user_id string (UUIDv7 with binary ids, else UUIDv4).
+    """
+    return str(uuid7() if BINARY_USER_IDS else uuid.uuid4())
+
+def user_id_to_db(user_id):
+    """
+    Converts a user_id string into the value stored in user_data.user_id.
+    """
+    if BINARY_USER_IDS and isinstance(user_id, str):
+        return uuid.UUID(user_id).bytes
+    return user_id
+
+def user_id_from_db(value):
+    """
+    Converts a user_data.user_id value back into its string form.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return str(uuid.UUID(bytes=bytes(value)))
+    return value
+
+def key_bound(hex_prefix):
+    """
+    Converts a hex prefix (e.g. "4000") into a user_id range bound.
+    """
+    return bytes.fromhex(hex_prefix) if BINARY_USER_IDS else hex_prefix
+
 def connect_db():
     """
     Connects to the MySQL server (no specific DB selected).
@@ -35,19 +88,225 @@ def create_database(connection):
     with connection.cursor() as cur:
         cur.execute("CREATE DATABASE IF NOT EXISTS ALX_prodev;")
 
-def connect_to_prodev():
+# Connection pool for connect_to_prodev(); PRODEV_POOL_SIZE=0 disables it.
+POOL_SIZE = int(os.getenv("PRODEV_POOL_SIZE", "5"))
+POOL_MAX_LIFETIME = float(os.getenv("PRODEV_POOL_MAX_LIFETIME", "1800"))
+POOL_TIMEOUT = float(os.getenv("PRODEV_POOL_TIMEOUT", "30"))
+# Idle connections older than this are pinged before being handed out.
+POOL_PING_AFTER = float(os.getenv("PRODEV_POOL_PING_AFTER", "5"))
+
+def _open_prodev(**options):
+    """
+    Opens a new raw connection to ALX_prodev (raises Error on failure).
+    """
+    return mysql.connector.connect(
+        host=MYSQL_HOST,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database="ALX_prodev",
+        autocommit=True,
+        **options
+    )
+
+class PooledConnection:
+    """
+    Proxy for a connection checked out of a ConnectionPool. Behaves like the
+    wrapped connection, except that close() returns it to the pool.
+    """
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Returns the connection to the pool (idempotent)."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._created_at)
+
+    def shutdown(self):
+        """Drops the socket (e.g. with unread rows) and frees the slot."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            getattr(conn, "shutdown", conn.close)()
+            self._pool.release(conn, self._created_at, discard=True)
+
+class ConnectionPool:
+    """
+    Thread-safe pool of at most `size` connections made by `factory`.
+    Connections older than max_lifetime seconds are retired, idle ones are
+    health-checked (ping) on checkout, and callers wait up to `timeout`
+    seconds for a free slot. stats() reports hit/miss/wait counters.
+    """
+
+    def __init__(self, factory, size=5, max_lifetime=1800.0, timeout=30.0,
+                 ping_after=5.0):
+        self.factory = factory
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = []  # (conn, created_at, returned_at)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0,
+                       "wait_seconds": 0.0, "discarded": 0}
+
+    def _usable(self, conn, created_at, returned_at, now):
+        """Lifetime and health check for an idle connection."""
+        if now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at >= self.ping_after:
+            try:
+                return conn.is_connected()
+            except Error:
+                return False
+        return True
+
+    def _discard(self, conn):
+        """Closes a connection that will not be reused."""
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _forget(self):
+        """Frees the slot of a discarded connection."""
+        with self._cond:
+            self._open -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        """
+        Checks out a PooledConnection; raises Error if no slot frees up
+        within `timeout` seconds or a new connection cannot be opened.
+        """
+        deadline = None
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._open < self.size:
+                        self._open += 1
+                        self._stats["misses"] += 1
+                        break
+                    now = time.monotonic()
+                    if deadline is None:
+                        deadline = now + self.timeout
+                        self._stats["waits"] += 1
+                    if now >= deadline:
+                        raise Error("Timed out waiting for a pooled connection")
+                    self._cond.wait(deadline - now)
+                    self._stats["wait_seconds"] += time.monotonic() - now
+            if candidate is None:
+                break
+            # ping/close outside the lock so other callers are not held up
+            conn, created_at, returned_at = candidate
+            try:
+                usable = self._usable(conn, created_at, returned_at,
+                                      time.monotonic())
+            except BaseException:
+                self._discard(conn)
+                self._forget()
+                raise
+            if usable:
+                with self._cond:
+                    self._stats["hits"] += 1
+                return PooledConnection(self, conn, created_at)
+            self._discard(conn)
+            self._forget()
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, conn, time.monotonic())
+
+    def release(self, conn, created_at, discard=False):
+        """Puts a connection back (or closes it if it is not reusable)."""
+        if not discard and getattr(conn, "unread_result", False):
+            discard = True  # an unbuffered result was abandoned mid-stream
+        if not discard and getattr(conn, "in_transaction", False):
+            try:
+                conn.rollback()
+            except Error:
+                discard = True
+        if discard:
+            self._discard(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Closes every idle connection (checked-out ones close on return)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Returns a snapshot of the pool counters."""
+        with self._cond:
+            return dict(self._stats, size=self.size, open=self._open,
+                        idle=len(self._idle))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the process-wide ALX_prodev ConnectionPool (created lazily).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _open_prodev,
+                    size=POOL_SIZE,
+                    max_lifetime=POOL_MAX_LIFETIME,
+                    timeout=POOL_TIMEOUT,
+                    ping_after=POOL_PING_AFTER,
+                )
+    return _pool
+
+def pool_stats():
+    """
+    Returns the hit/miss/wait counters of the connect_to_prodev() pool.
+    """
+    return get_pool().stats()
+
+def connect_to_prodev(pooled=True, **options):
     """
     Connects to the ALX_prodev database.
+    By default the connection comes from the process-wide pool and
+    close() hands it back. pooled=False, PRODEV_POOL_SIZE=0 or extra
+    keyword options for mysql.connector.connect (e.g.
+    allow_local_infile=True) open a dedicated connection instead.
     """
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_HOST,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
-            database="ALX_prodev",
-            autocommit=True
-        )
-        return conn
+        if pooled and POOL_SIZE > 0 and not options:
+            return get_pool().acquire()
+        return _open_prodev(**options)
     except Error as e:
         print(f"Error connecting to ALX_prodev: {e}")
         return None
@@ -56,53 +315,373 @@ def create_table(connection):
     """
     Creates table user_data if it doesn't exist.
     user_id: Primary Key, UUID, Indexed
+             (CHAR(36), or BINARY(16) when BINARY_USER_IDS is set)
     name: VARCHAR NOT NULL
     email: VARCHAR NOT NULL
-    age: DECIMAL NOT NULL  (we'll use DECIMAL(3,0) to match integer ages)
+    age: DECIMAL NOT NULL  (we'll use DECIMAL(3,0) to match integer ages), Indexed
+    updated_at: TIMESTAMP(6), set on insert and on every update; indexed
+                with user_id for incremental (change-capture) scans
     """
-    ddl = """
+    user_id_type = "BINARY(16)" if BINARY_USER_IDS else "CHAR(36)"
+    ddl = f"""
     CREATE TABLE IF NOT EXISTS user_data (
-        user_id CHAR(36) PRIMARY KEY,
+        user_id {user_id_type} PRIMARY KEY,
         name VARCHAR(255) NOT NULL,
         email VARCHAR(255) NOT NULL,
-        age DECIMAL(3,0) NOT NULL
+        age DECIMAL(3,0) NOT NULL,
+        updated_at TIMESTAMP(6) NOT NULL
+            DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+        INDEX idx_user_data_age (age),
+        INDEX idx_user_data_updated (updated_at, user_id)
     ) ENGINE=InnoDB;
     """
     with connection.cursor() as cur:
         cur.execute(ddl)
+        # tables created by older versions of this script need upgrading
+        cur.execute("SHOW COLUMNS FROM user_data LIKE 'updated_at'")
+        if not cur.fetchall():
+            cur.execute(
+                "ALTER TABLE user_data ADD COLUMN updated_at TIMESTAMP(6) NOT NULL "
+                "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+            )
+        for name, columns in (("idx_user_data_age", "age"),
+                              ("idx_user_data_updated", "updated_at, user_id")):
+            cur.execute(f"SHOW INDEX FROM user_data WHERE Key_name = '{name}'")
+            if not cur.fetchall():
+                cur.execute(f"ALTER TABLE user_data ADD INDEX {name} ({columns})")
     print("Table user_data created successfully")
 
-def insert_data(connection, csv_path):
+def read_csv_rows(csv_path):
     """
-    Inserts CSV rows if they do not already exist.
-    Expects CSV with headers: user_id (optional), name, email, age
-    If user_id is missing/empty, a UUID is generated.
-    Uses ON DUPLICATE KEY UPDATE to ignore duplicates.
+    Generator that yields (user_id, name, email, age) tuples from the CSV,
+    one row at a time, with user_id already in its stored form. Rows
+    missing name/email/age are skipped and a UUID is generated when
+    user_id is missing/empty.
     """
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV not found: {csv_path}")
 
-    rows = []
     with open(csv_path, newline='', encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for r in reader:
-            uid = r.get("user_id") or str(uuid.uuid4())
+            uid = user_id_to_db(r.get("user_id") or new_user_id())
             name = r.get("name", "").strip()
             email = r.get("email", "").strip()
             age = r.get("age", "").strip()
             if not name or not email or age == "":
                 continue
-            rows.append((uid, name, email, age))
+            yield (uid, name, email, age)
 
-    if not rows:
-        print("No rows to insert.")
-        return
+def iter_chunks(iterable, size):
+    """
+    Generator that groups an iterable into lists of at most `size` items.
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Hand-off from producer threads to a consuming generator over a bounded
+# queue: items, then DONE (or a Failure carrying the producer's error).
+DONE = object()
 
-    sql = """
+class Failure:
+    """Carries an exception from a producer thread to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+def put_until_stopped(out, stop, item):
+    """
+    Blocking put on queue `out` that gives up once the `stop` event is set
+    (the consumer went away). Returns whether the item was queued.
+    """
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+INSERT_SQL = """
     INSERT INTO user_data (user_id, name, email, age)
     VALUES (%s, %s, %s, %s)
     ON DUPLICATE KEY UPDATE user_id = user_data.user_id;
     """
+
+def insert_data(connection, csv_path):
+    """
+    Inserts CSV rows if they do not already exist.
+    Expects CSV with headers: user_id (optional), name, email, age
+    If user_id is missing/empty, a UUID is generated.
+    Uses ON DUPLICATE KEY UPDATE to ignore duplicates.
+    """
+    rows = list(read_csv_rows(csv_path))
+
+    if not rows:
+        print("No rows to insert.")
+        return
+
     with connection.cursor() as cur:
-        cur.executemany(sql, rows)
+        cur.executemany(INSERT_SQL, rows)
     print(f"Inserted/Skipped {len(rows)} rows from {csv_path}")
+
+def _peak_rss_kb():
+    """
+    Peak resident set size of this process in KB, or None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def load_data_infile(connection, csv_path):
+    """
+    Fast path: lets the server parse the CSV with LOAD DATA LOCAL INFILE.
+    The connection must be opened with allow_local_infile=True and the
+    server must have local_infile enabled. Missing user_ids get UUID()
+    (a v1 UUID, so binary ids generated here are not time-ordered).
+
+    The file is loaded into a temporary staging table first and copied
+    with the same rules as read_csv_rows (values trimmed, rows missing
+    name/email/age skipped), so both loaders produce the same table.
+    Lines may end in CRLF (csv.writer's default) or LF; the header line
+    decides which, so no value keeps a stray carriage return.
+    Returns the number of rows inserted.
+    """
+    with open(csv_path, newline='', encoding="utf-8") as f:
+        first_line = f.readline()
+    header = [col.strip() for col in next(csv.reader([first_line]), [])]
+    line_end = "\\r\\n" if first_line.endswith("\r\n") else "\\n"
+    known = {"user_id", "name", "email", "age"}
+    columns = ", ".join(h if h in known else "@skip" for h in header)
+    user_id_expr = "COALESCE(NULLIF(user_id, ''), UUID())"
+    if BINARY_USER_IDS:
+        user_id_expr = f"UUID_TO_BIN({user_id_expr})"
+    with connection.cursor() as cur:
+        cur.execute(
+            "CREATE TEMPORARY TABLE user_data_load ("
+            "user_id VARCHAR(36) NULL, name VARCHAR(255) NULL, "
+            "email VARCHAR(255) NULL, age VARCHAR(32) NULL"
+            ") CHARACTER SET utf8mb4"
+        )
+        try:
+            cur.execute(
+                "LOAD DATA LOCAL INFILE %s INTO TABLE user_data_load "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '{line_end}' IGNORE 1 LINES "
+                f"({columns})",
+                (os.path.abspath(csv_path),)
+            )
+            cur.execute(
+                "INSERT INTO user_data (user_id, name, email, age) "
+                f"SELECT {user_id_expr}, TRIM(name), TRIM(email), TRIM(age) "
+                "FROM user_data_load "
+                "WHERE TRIM(name) <> '' AND TRIM(email) <> '' "
+                "AND TRIM(age) <> '' "
+                "ON DUPLICATE KEY UPDATE user_id = user_data.user_id"
+            )
+            rows = cur.rowcount
+            connection.commit()
+            return rows
+        finally:
+            cur.execute("DROP TEMPORARY TABLE IF EXISTS user_data_load")
+
+def _insert_worker(chunks, errors, counter, lock):
+    """
+    Worker thread body: inserts chunks from the queue on its own
+    (unpooled) connection until it receives the None sentinel.
+    """
+    conn = connect_to_prodev(pooled=False)
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if conn is None or errors:
+                continue  # keep draining so the producer never blocks
+            try:
+                with conn.cursor() as cur:
+                    cur.executemany(INSERT_SQL, chunk)
+                conn.commit()
+                with lock:
+                    counter[0] += len(chunk)
+            except Error as e:
+                errors.append(e)
+        if conn is None:
+            errors.append(Error("worker could not connect to ALX_prodev"))
+    finally:
+        if conn is not None:
+            conn.close()
+
+def bulk_insert_data(connection, csv_path, chunk_size=5000, workers=1,
+                     local_infile=False):
+    """
+    Streaming loader for large CSVs: never holds more than a few chunks in
+    memory and commits once per chunk, so no single statement can exceed
+    max_allowed_packet.
+
+    - local_infile=True (opt-in) first tries load_data_infile() on a
+      dedicated connection and falls back to chunked executemany if the
+      server or client refuses LOCAL INFILE.
+    - workers > 1 spreads the chunks over that many extra connections.
+
+    Prints and returns a stats dict: rows, seconds, rows_per_sec,
+    peak_rss_kb and method.
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+
+    start = time.perf_counter()
+    rows = None
+    method = "executemany"
+
+    if local_infile:
+        infile_conn = connect_to_prodev(allow_local_infile=True)
+        if infile_conn:
+            try:
+                rows = load_data_infile(infile_conn, csv_path)
+                method = "load_data_infile"
+            except Error as e:
+                print(f"LOAD DATA LOCAL INFILE unavailable, falling back: {e}")
+            finally:
+                infile_conn.close()
+
+    if rows is None:
+        chunks = iter_chunks(read_csv_rows(csv_path), chunk_size)
+        if workers <= 1:
+            rows = 0
+            for chunk in chunks:
+                with connection.cursor() as cur:
+                    cur.executemany(INSERT_SQL, chunk)
+                connection.commit()
+                rows += len(chunk)
+        else:
+            method = f"executemany x{workers}"
+            pending = queue.Queue(maxsize=workers * 2)
+            errors, counter, lock = [], [0], threading.Lock()
+            threads = [
+                threading.Thread(target=_insert_worker,
+                                 args=(pending, errors, counter, lock),
+                                 daemon=True)
+                for _ in range(workers)
+            ]
+            for t in threads:
+                t.start()
+            try:
+                for chunk in chunks:
+                    if errors:
+                        break
+                    pending.put(chunk)
+            finally:
+                for _ in threads:
+                    pending.put(None)
+                for t in threads:
+                    t.join()
+            if errors:
+                raise errors[0]
+            rows = counter[0]
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "peak_rss_kb": _peak_rss_kb(),
+        "method": method,
+    }
+    print(
+        f"Loaded {rows} rows from {csv_path} via {method} in {elapsed:.2f}s "
+        f"({stats['rows_per_sec']:.0f} rows/s, peak RSS {stats['peak_rss_kb']} KB)"
+    )
+    return stats
+
+def encode_cursor(user_id):
+    """
+    Encodes the last seen user_id as an opaque resume cursor.
+    """
+    return base64.urlsafe_b64encode(str(user_id).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """
+    Decodes a resume cursor back into the user_id to resume after.
+    Returns None for an empty cursor (start of table).
+    """
+    if not cursor:
+        return None
+    return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+
+def resume_cursor(batch):
+    """
+    Returns the resume cursor for a batch/page of user dicts (or a
+    column-oriented batch), i.e. the position right after its last row.
+    Returns None for an empty batch.
+    """
+    user_ids = batch["user_id"] if isinstance(batch, dict) else batch
+    if not len(user_ids):
+        return None
+    last = user_ids[-1]
+    return encode_cursor(last if isinstance(batch, dict) else last["user_id"])
+
+FILTER_COLUMNS = ("user_id", "name", "email", "age")
+FILTER_OPERATORS = {
+    "eq": "{} = %s",
+    "ne": "{} <> %s",
+    "gt": "{} > %s",
+    "gte": "{} >= %s",
+    "lt": "{} < %s",
+    "lte": "{} <= %s",
+    "startswith": "{} LIKE %s",
+    "endswith": "{} LIKE %s",
+    "contains": "{} LIKE %s",
+}
+
+def _escape_like(value):
+    """
+    Escapes LIKE wildcards so the value is matched literally.
+    """
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def compile_filters(filters):
+    """
+    Compiles Django-style lookups on user_data into parameterized SQL, e.g.
+    {"age__gt": 25, "email__endswith": "@example.com"} ->
+    (["age > %s", "email LIKE %s"], [25, "%@example.com"]).
+    A bare column name means equality and `__in` takes a sequence.
+    Raises ValueError for unknown columns or operators.
+    """
+    conditions, params = [], []
+    for key, value in (filters or {}).items():
+        column, _, op = key.partition("__")
+        op = op or "eq"
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown filter column: {column}")
+        if column == "user_id" and op in ("eq", "ne", "gt", "gte", "lt", "lte"):
+            value = user_id_to_db(value)
+        if op == "in":
+            values = list(value)
+            if column == "user_id":
+                values = [user_id_to_db(v) for v in values]
+            if not values:
+                conditions.append("1 = 0")
+                continue
+            placeholders = ", ".join(["%s"] * len(values))
+            conditions.append(f"{column} IN ({placeholders})")
+            params.extend(values)
+            continue
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {op}")
+        conditions.append(FILTER_OPERATORS[op].format(column))
+        if op == "startswith":
+            value = _escape_like(value) + "%"
+        elif op == "endswith":
+            value = "%" + _escape_like(value)
+        elif op == "contains":
+            value = "%" + _escape_like(value) + "%"
+        params.append(value)
+    return conditions, params
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Unit tests for 5-async_streams.py.
+
+Covers:
+- stream_users, stream_users_in_batches, lazy_paginate and
+  stream_user_ages against the in-memory SQLiteBackend
+- _prefetched_pages: the next page is fetched while the current one is
+  consumed, and closing early cancels that fetch
+- closing a generator early closes the backend stream it reads
+
+Runs offline (no MySQL server needed).
+"""
+import asyncio
+import unittest
+
+streams = __import__('5-async_streams')
+
+ROWS = [(f"{i:08d}", f"user{i}", f"user{i}@example.com", 18 + i % 60)
+        for i in range(1000)]
+
+
+class RecordingBackend(streams.SQLiteBackend):
+    """SQLiteBackend that records page fetches and can hold them."""
+
+    def __init__(self):
+        super().__init__()
+        self.fetches = []
+        self.cancelled = []
+        self.hold = None  # set to an Event to block fetches after the first
+        self.open_streams = 0
+
+    async def fetch(self, sql, params=()):
+        self.fetches.append(params)
+        if self.hold is not None and len(self.fetches) > 1:
+            try:
+                await self.hold.wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(params)
+                raise
+        return await super().fetch(sql, params)
+
+    async def stream(self, sql, params=(), size=1000):
+        self.open_streams += 1
+        try:
+            async for row in super().stream(sql, params, size):
+                yield row
+        finally:
+            self.open_streams -= 1
+
+
+class TestAsyncStreams(unittest.IsolatedAsyncioTestCase):
+    """Tests for the async generators."""
+
+    async def asyncSetUp(self):
+        self.backend = RecordingBackend()
+        await self.backend.create_table(ROWS)
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+
+    async def test_stream_users(self):
+        """Every row comes back once, as a dict with an int age."""
+        users = [u async for u in streams.stream_users(self.backend)]
+        self.assertEqual(len(users), 1000)
+        self.assertEqual(users[0], {"user_id": "00000000", "name": "user0",
+                                    "email": "user0@example.com", "age": 18})
+        self.assertEqual(len({u["user_id"] for u in users}), 1000)
+
+    async def test_early_close_closes_stream(self):
+        """Closing stream_users early closes the backend's cursor."""
+        users = streams.stream_users(self.backend)
+        await users.__anext__()
+        self.assertEqual(self.backend.open_streams, 1)
+        await users.aclose()
+        self.assertEqual(self.backend.open_streams, 0)
+
+    async def test_stream_users_in_batches(self):
+        """Batches follow user_id order; the last one is partial."""
+        batches = [b async for b in
+                   streams.stream_users_in_batches(300, self.backend)]
+        self.assertEqual([len(b) for b in batches], [300, 300, 300, 100])
+        ids = [u["user_id"] for b in batches for u in b]
+        self.assertEqual(ids, [r[0] for r in ROWS])
+        # a partial page ends the walk without another query
+        self.assertEqual(len(self.backend.fetches), 4)
+
+    async def test_lazy_paginate_exact_pages(self):
+        """An exact multiple of the page size ends on an empty fetch."""
+        pages = [p async for p in streams.lazy_paginate(250, self.backend)]
+        self.assertEqual([len(p) for p in pages], [250] * 4)
+        self.assertEqual(len(self.backend.fetches), 5)
+        self.assertIs(streams.lazy_pagination, streams.lazy_paginate)
+
+    async def test_empty_table(self):
+        """No rows, no pages."""
+        backend = streams.SQLiteBackend()
+        await backend.create_table()
+        pages = [p async for p in streams.lazy_paginate(10, backend)]
+        await backend.close()
+        self.assertEqual(pages, [])
+
+    async def test_stream_user_ages(self):
+        """Ages are streamed as ints."""
+        ages = [a async for a in streams.stream_user_ages(self.backend)]
+        self.assertEqual(sum(ages), sum(r[3] for r in ROWS))
+        self.assertTrue(all(isinstance(a, int) for a in ages))
+
+    async def test_prefetches_next_page(self):
+        """Page N+1 is fetched while the consumer works on page N."""
+        pages = streams.lazy_paginate(100, self.backend)
+        first = await pages.__anext__()
+        self.assertEqual(len(first), 100)
+        await asyncio.sleep(0)  # the consumer awaits something else
+        self.assertEqual(self.backend.fetches[1][0], first[-1]["user_id"])
+        await pages.aclose()
+
+    async def test_early_close_cancels_prefetch(self):
+        """Closing after the first page cancels the fetch in flight."""
+        self.backend.hold = asyncio.Event()
+        pages = streams.stream_users_in_batches(100, self.backend)
+        await pages.__anext__()
+        await asyncio.sleep(0)  # let the prefetch start waiting
+        await pages.aclose()
+        await asyncio.sleep(0)
+        self.assertEqual(len(self.backend.cancelled), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()